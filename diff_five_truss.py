@@ -1,7 +1,8 @@
 import math
 import numpy as np 
 from truss_V3 import Beam, Node
-from openmdao.api import ExplicitComponent, Problem, Group, IndepVarComp, ExecComp, NonlinearBlockGS, NewtonSolver, DirectSolver, ScipyOptimizeDriver, ArmijoGoldsteinLS
+from truss_V4 import StressConstraint, StructuralMass
+from openmdao.api import ExplicitComponent, Problem, Group, IndepVarComp, ExecComp, NonlinearBlockGS, NewtonSolver, DirectSolver, ScipyOptimizeDriver, ArmijoGoldsteinLS, MuxComp
 
 class Truss_Analysis(Group):
     
@@ -31,8 +32,7 @@ class Truss_Analysis(Group):
         indeps.add_output("A2", 1)
         indeps.add_output("A3", 1)
         indeps.add_output("A4", 1)
-        indeps.add_output("L1")
-        indeps.add_output("L2")
+        indeps.add_output("L", [2 ** .5, 1, 1, 1, 1], units = "m", desc = "Length of each beam")
         
         cycle = self.add_subsystem("cycle", Group())
         cycle.add_subsystem("node0", Node(n_loads = 2, n_reactions = 2))
@@ -86,28 +86,31 @@ class Truss_Analysis(Group):
         cycle.nonlinear_solver.options['atol'] = 1e-7
         cycle.nonlinear_solver.options['solve_subsystems'] = True
         cycle.nonlinear_solver.options["iprint"] = 2
-        cycle.linear_solver = DirectSolver()
+        cycle.linear_solver = DirectSolver(assemble_jac = True)
 
 
-        self.add_subsystem("obj_cmp", ExecComp("obj = L1 * (A3 + A1 + A2 + A4) + L2 * A0"))
-        self.add_subsystem("con0", ExecComp("con = 400 - abs(sigma)"))
-        self.add_subsystem("con1", ExecComp("con = 400 - abs(sigma)"))
-        self.add_subsystem("con2", ExecComp("con = 400 - abs(sigma)"))
-        self.add_subsystem("con3", ExecComp("con = 400 - abs(sigma)"))
-        self.add_subsystem("con4", ExecComp("con = 400 - abs(sigma)"))
+        # areas of every beam are gathered into one vector for the structural volume
+        area = self.add_subsystem("area", MuxComp(vec_size = 5))
+        area.add_var("A", shape = (1,), axis = 0, units = "m**2")
+        self.add_subsystem("obj_cmp", StructuralMass(n_members = 5))
+        # stresses of every beam are gathered into one vector for a single vectorized stress constraint
+        stress = self.add_subsystem("stress", MuxComp(vec_size = 5))
+        stress.add_var("sigma", shape = (1,), axis = 0, units = "MPa")
+        self.add_subsystem("con", StressConstraint(n_members = 5))
 
-        self.connect("indeps.L1", ["obj_cmp.L1"])
-        self.connect("indeps.L2", ["obj_cmp.L2"])
-        self.connect("cycle.beam0.sigma", ["con0.sigma"])
-        self.connect("cycle.beam1.sigma", ["con1.sigma"])
-        self.connect("cycle.beam2.sigma", ["con2.sigma"])
-        self.connect("cycle.beam3.sigma", ["con3.sigma"])
-        self.connect("cycle.beam4.sigma", ["con4.sigma"])
-        self.connect("indeps.A0", ["cycle.beam0.A", "obj_cmp.A0"])
-        self.connect("indeps.A1", ["cycle.beam1.A", "obj_cmp.A1"])
-        self.connect("indeps.A2", ["cycle.beam2.A", "obj_cmp.A2"])
-        self.connect("indeps.A3", ["cycle.beam3.A", "obj_cmp.A3"])
-        self.connect("indeps.A4", ["cycle.beam4.A", "obj_cmp.A4"])
+        self.connect("indeps.L", "obj_cmp.L")
+        self.connect("cycle.beam0.sigma", "stress.sigma_0")
+        self.connect("cycle.beam1.sigma", "stress.sigma_1")
+        self.connect("cycle.beam2.sigma", "stress.sigma_2")
+        self.connect("cycle.beam3.sigma", "stress.sigma_3")
+        self.connect("cycle.beam4.sigma", "stress.sigma_4")
+        self.connect("stress.sigma", "con.sigma")
+        self.connect("indeps.A0", ["cycle.beam0.A", "area.A_0"])
+        self.connect("indeps.A1", ["cycle.beam1.A", "area.A_1"])
+        self.connect("indeps.A2", ["cycle.beam2.A", "area.A_2"])
+        self.connect("indeps.A3", ["cycle.beam3.A", "area.A_3"])
+        self.connect("indeps.A4", ["cycle.beam4.A", "area.A_4"])
+        self.connect("area.A", "obj_cmp.A")
 
 if __name__ == "__main__":
 
@@ -116,6 +119,7 @@ if __name__ == "__main__":
 
     prob.driver = ScipyOptimizeDriver()
     prob.driver.options["optimizer"] = "SLSQP"
+    prob.driver.declare_coloring()
 
     prob.model.add_design_var("indeps.A0", lower = 0.001, upper = 100)
     prob.model.add_design_var("indeps.A1", lower = 0.001, upper = 100)
@@ -123,13 +127,9 @@ if __name__ == "__main__":
     prob.model.add_design_var("indeps.A3", lower = 0.001, upper = 100)
     prob.model.add_design_var("indeps.A4", lower = 0.001, upper = 100)
     prob.model.add_objective("obj_cmp.obj")
-    prob.model.add_constraint("con0.con", lower = 0)
-    prob.model.add_constraint("con1.con", lower = 0)
-    prob.model.add_constraint("con2.con", lower = 0)
-    prob.model.add_constraint("con3.con", lower = 0)
-    prob.model.add_constraint("con4.con", lower = 0)
+    prob.model.add_constraint("con.con", lower = 0)
 
-    prob.setup(force_alloc_complex = True)
+    prob.setup(mode = "rev", force_alloc_complex = True)
     # prob.check_partials(compact_print = True, method = "cs")
     # prob.check_totals()
     # exit()
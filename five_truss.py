@@ -55,42 +55,43 @@ class Truss_Analysis(Group):
         self.connect("indeps.A5", ["trussAC.A", "obj_cmp.A5"])
 
 
-prob = Problem()
-prob.model = Truss_Analysis()
+if __name__ == "__main__":
 
-prob.driver = ScipyOptimizeDriver()
-prob.driver.options["optimizer"] = "SLSQP"
-# prob.driver.options["tol"] = 1e-8
+    prob = Problem()
+    prob.model = Truss_Analysis()
 
-prob.model.add_design_var("indeps.A1", lower = 0.0001, upper = 100)
-prob.model.add_design_var("indeps.A2", lower = 0.0001, upper = 100)
-prob.model.add_design_var("indeps.A3", lower = 0.0001, upper = 100)
-prob.model.add_design_var("indeps.A4", lower = 0.0001, upper = 100)
-prob.model.add_design_var("indeps.A5", lower = 0.0001, upper = 100)
-prob.model.add_objective("obj_cmp.obj")
-prob.model.add_constraint("con1.con", lower = 0)
-prob.model.add_constraint("con2.con", lower = 0)
-prob.model.add_constraint("con3.con", lower = 0)
-prob.model.add_constraint("con4.con", lower = 0)
-prob.model.add_constraint("con5.con", lower = 0)
+    prob.driver = ScipyOptimizeDriver()
+    prob.driver.options["optimizer"] = "SLSQP"
+    # prob.driver.options["tol"] = 1e-8
 
-prob.setup()
-# prob.check_partials(compact_print = True)
-prob.set_solver_print(level = 0)
+    prob.model.add_design_var("indeps.A1", lower = 0.0001, upper = 100)
+    prob.model.add_design_var("indeps.A2", lower = 0.0001, upper = 100)
+    prob.model.add_design_var("indeps.A3", lower = 0.0001, upper = 100)
+    prob.model.add_design_var("indeps.A4", lower = 0.0001, upper = 100)
+    prob.model.add_design_var("indeps.A5", lower = 0.0001, upper = 100)
+    prob.model.add_objective("obj_cmp.obj")
+    prob.model.add_constraint("con1.con", lower = 0)
+    prob.model.add_constraint("con2.con", lower = 0)
+    prob.model.add_constraint("con3.con", lower = 0)
+    prob.model.add_constraint("con4.con", lower = 0)
+    prob.model.add_constraint("con5.con", lower = 0)
 
-prob.model.approx_totals()
+    prob.setup()
+    # prob.check_partials(compact_print = True)
+    prob.set_solver_print(level = 0)
 
-prob.run_driver()
+    prob.model.approx_totals()
 
-print("minimum found at")
-print("A1 = ", prob["indeps.A1"])
-print("P1 = ", prob["indeps.P1"])
-print("A2 = ", prob["indeps.A2"])
-print("P2 = ", prob["indeps.P2"])
-print("A3 = ", prob["indeps.A3"])
-print("P3 = ", prob["indeps.P3"])
-print("A4 = ", prob["indeps.A4"])
-print("P4 = ", prob["indeps.P4"])
-print("A5 = ", prob["indeps.A5"])
-print("P5 = ", prob["indeps.P5"])
+    prob.run_driver()
 
+    print("minimum found at")
+    print("A1 = ", prob["indeps.A1"])
+    print("P1 = ", prob["indeps.P1"])
+    print("A2 = ", prob["indeps.A2"])
+    print("P2 = ", prob["indeps.P2"])
+    print("A3 = ", prob["indeps.A3"])
+    print("P3 = ", prob["indeps.P3"])
+    print("A4 = ", prob["indeps.A4"])
+    print("P4 = ", prob["indeps.P4"])
+    print("A5 = ", prob["indeps.A5"])
+    print("P5 = ", prob["indeps.P5"])
@@ -0,0 +1,45 @@
+import math
+import numpy as np
+from truss_builder import TrussGeometry, Truss_Model
+from openmdao.api import Problem, ScipyOptimizeDriver
+
+def five_truss_geometry():
+
+    F = 4 * 10 ** 7
+
+    # node coordinates in m, node 0 is a pinned joint and node 1 is a roller joint
+    nodes = [[0, 1], [0, 0], [1, 0], [1, 1]]
+    # node at the 0th and 1st end of each beam
+    members = [[0, 3], [0, 1], [1, 2], [1, 3], [2, 3]]
+    supports = [[0, math.pi], [0, math.pi / 2], [1, 0]]
+    loads = [[2, F, math.pi * 3 / 2]]
+
+    return TrussGeometry(nodes, members, supports, loads)
+
+class Truss_Analysis(Truss_Model):
+
+    def initialize(self):
+        super().initialize()
+        self.options["geometry"] = five_truss_geometry()
+
+if __name__ == "__main__":
+
+    prob = Problem()
+    prob.model = Truss_Analysis()
+
+    prob.driver = ScipyOptimizeDriver()
+    prob.driver.options["optimizer"] = "SLSQP"
+    prob.driver.declare_coloring()
+
+    prob.model.add_design_var("indeps.A", lower = 0.001, upper = 100)
+    prob.model.add_objective("obj_cmp.obj")
+    prob.model.add_constraint("con.con", lower = 0)
+
+    prob.setup(mode = "rev", force_alloc_complex = True)
+    # prob.check_partials(compact_print = True, method = "cs")
+    prob.run_driver()
+
+    print("minimum found at")
+    print("A = ", prob["indeps.A"])
+    print("beam_force", prob["cycle.truss.force"][:5])
+    print("reaction", prob["cycle.truss.force"][5:])
@@ -1,6 +1,6 @@
 import math
 import numpy as np 
-from three_truss_V2 import truss, Node
+from truss_V2 import truss, Node
 from openmdao.api import ExplicitComponent, Problem, Group, IndepVarComp, ExecComp, NonlinearBlockGS, NewtonSolver, DirectSolver, ScipyOptimizeDriver
 
 class Truss_Analysis(Group):
@@ -112,52 +112,49 @@ class Truss_Analysis(Group):
         self.connect("indeps.A6", ["truss6.A", "obj_cmp.A6"])
         self.connect("indeps.A7", ["truss7.A", "obj_cmp.A7"])
 
-prob = Problem()
-prob.model = Truss_Analysis()
-
-prob.driver = ScipyOptimizeDriver()
-prob.driver.options["optimizer"] = "SLSQP"
-# prob.driver.options["tol"] = 1e-8
-
-prob.model.add_design_var("indeps.A1", lower = 0.001, upper = 100)
-prob.model.add_design_var("indeps.A2", lower = 0.001, upper = 100)
-prob.model.add_design_var("indeps.A3", lower = 0.001, upper = 100)
-prob.model.add_design_var("indeps.A4", lower = 0.001, upper = 100)
-prob.model.add_design_var("indeps.A5", lower = 0.001, upper = 100)
-prob.model.add_design_var("indeps.A6", lower = 0.001, upper = 100)
-prob.model.add_design_var("indeps.A7", lower = 0.001, upper = 100)
-prob.model.add_objective("obj_cmp.obj")
-prob.model.add_constraint("con1.con", lower = 0)
-prob.model.add_constraint("con2.con", lower = 0)
-prob.model.add_constraint("con3.con", lower = 0)
-prob.model.add_constraint("con4.con", lower = 0)
-prob.model.add_constraint("con5.con", lower = 0)
-prob.model.add_constraint("con6.con", lower = 0)
-prob.model.add_constraint("con7.con", lower = 0)
-
-prob.setup()
-# prob.check_partials(compact_print = True)
-prob.set_solver_print(level = 0)
-
-prob.model.approx_totals()
-
-prob.run_driver()
-
-print("minimum found at")
-print("A1 = ", prob["indeps.A1"])
-print("truss1.P", prob["truss1.P"])
-print("A2 = ", prob["indeps.A2"])
-print("truss2.P", prob["truss2.P"])
-print("A3 = ", prob["indeps.A3"])
-print("truss3.P", prob["truss3.P"])
-print("A4 = ", prob["indeps.A4"])
-print("truss4.P", prob["truss4.P"])
-print("A5 = ", prob["indeps.A5"])
-print("truss5.P", prob["truss5.P"])
-print("A6 = ", prob["indeps.A6"])
-print("truss6.P", prob["truss6.P"])
-print("A7 = ", prob["indeps.A7"])
-print("truss7.P", prob["truss7.P"])
-
-
-
+if __name__ == "__main__":
+
+    prob = Problem()
+    prob.model = Truss_Analysis()
+
+    prob.driver = ScipyOptimizeDriver()
+    prob.driver.options["optimizer"] = "SLSQP"
+    # prob.driver.options["tol"] = 1e-8
+
+    prob.model.add_design_var("indeps.A1", lower = 0.001, upper = 100)
+    prob.model.add_design_var("indeps.A2", lower = 0.001, upper = 100)
+    prob.model.add_design_var("indeps.A3", lower = 0.001, upper = 100)
+    prob.model.add_design_var("indeps.A4", lower = 0.001, upper = 100)
+    prob.model.add_design_var("indeps.A5", lower = 0.001, upper = 100)
+    prob.model.add_design_var("indeps.A6", lower = 0.001, upper = 100)
+    prob.model.add_design_var("indeps.A7", lower = 0.001, upper = 100)
+    prob.model.add_objective("obj_cmp.obj")
+    prob.model.add_constraint("con1.con", lower = 0)
+    prob.model.add_constraint("con2.con", lower = 0)
+    prob.model.add_constraint("con3.con", lower = 0)
+    prob.model.add_constraint("con4.con", lower = 0)
+    prob.model.add_constraint("con5.con", lower = 0)
+    prob.model.add_constraint("con6.con", lower = 0)
+    prob.model.add_constraint("con7.con", lower = 0)
+
+    prob.setup()
+    # prob.check_partials(compact_print = True)
+    prob.set_solver_print(level = 0)
+
+    prob.run_driver()
+
+    print("minimum found at")
+    print("A1 = ", prob["indeps.A1"])
+    print("truss1.P", prob["truss1.P"])
+    print("A2 = ", prob["indeps.A2"])
+    print("truss2.P", prob["truss2.P"])
+    print("A3 = ", prob["indeps.A3"])
+    print("truss3.P", prob["truss3.P"])
+    print("A4 = ", prob["indeps.A4"])
+    print("truss4.P", prob["truss4.P"])
+    print("A5 = ", prob["indeps.A5"])
+    print("truss5.P", prob["truss5.P"])
+    print("A6 = ", prob["indeps.A6"])
+    print("truss6.P", prob["truss6.P"])
+    print("A7 = ", prob["indeps.A7"])
+    print("truss7.P", prob["truss7.P"])
@@ -107,7 +107,7 @@ class Truss_Analysis(Group):
         cycle.nonlinear_solver.options['solve_subsystems'] = True
         cycle.nonlinear_solver.options["iprint"] = 2
         # cycle.nonlinear_solver.options["maxiter"] = 2
-        cycle.linear_solver = DirectSolver()
+        cycle.linear_solver = DirectSolver(assemble_jac = True)
 
 
         self.add_subsystem("obj_cmp", ExecComp("obj = L1 * (A0 + A1 + A2 + A4 + A5 + A6) + L2 * A3"))
@@ -143,6 +143,7 @@ if __name__ == "__main__":
 
     prob.driver = ScipyOptimizeDriver()
     prob.driver.options["optimizer"] = "SLSQP"
+    prob.driver.declare_coloring()
 
     # prob.model.add_design_var("indeps.A0", lower = 0.001, upper = 100)
     # prob.model.add_design_var("indeps.A1", lower = 0.001, upper = 100)
@@ -160,7 +161,7 @@ if __name__ == "__main__":
     # prob.model.add_constraint("con5.con", lower = 0)
     # prob.model.add_constraint("con6.con", lower = 0)
 
-    prob.setup(force_alloc_complex = True)
+    prob.setup(mode = "rev", force_alloc_complex = True)
     # prob.check_partials(compact_print = True, method = "cs")
     # prob.check_totals()
     # exit()
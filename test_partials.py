@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from openmdao.api import Problem, Group, IndepVarComp
+from openmdao.utils.assert_utils import assert_check_partials
+from truss_V2 import Node
+from truss_V4 import StressConstraint
+from truss_builder import Truss_Model, Truss_V3_Model
+from truss_joints import Joints_Model
+from seven_truss_V4 import seven_truss_geometry
+
+
+def check_partials(model, **kwargs):
+    prob = Problem(model, reports = None)
+    prob.setup(force_alloc_complex = True)
+    prob.set_solver_print(level = -1)
+    for name, value in kwargs.items():
+        prob[name] = value
+    prob.run_model()
+    data = prob.check_partials(method = "cs", compact_print = True, out_stream = None)
+    assert_check_partials(data, atol = 1e-6, rtol = 1e-6)
+
+
+@pytest.mark.parametrize("solve_first", ["x", "y"])
+@pytest.mark.parametrize("n_unknown", [1, 2])
+@pytest.mark.parametrize("frame", [0., .3])
+def test_v2_node(solve_first, n_unknown, frame):
+    n_known = 3
+    model = Group()
+    indeps = model.add_subsystem("indeps", IndepVarComp(), promotes = ["*"])
+    rng = np.random.default_rng(0)
+    for i in range(n_known):
+        indeps.add_output(f"known_force {i + 1}", rng.uniform(-4e7, 4e7), units = "N")
+        indeps.add_output(f"old_direction {i + 1}", rng.uniform(0, 2 * np.pi), units = "rad")
+    # directions away from the axes, so no unknown is parallel to the axis it is summed along
+    for i, direction in enumerate([.4, 2.][:n_unknown]):
+        indeps.add_output(f"new_direction {i + 1}", direction, units = "rad")
+    model.add_subsystem("node", Node(n_known = n_known, n_unknown = n_unknown, solve_first = solve_first, frame = frame), promotes = ["*"])
+    check_partials(model)
+
+
+@pytest.mark.parametrize("ks", [False, True])
+@pytest.mark.parametrize("n_cases", [1, 3])
+def test_stress_constraint(ks, n_cases):
+    n_members = 5
+    shape = (n_members,) if n_cases == 1 else (n_cases, n_members)
+    model = Group()
+    model.add_subsystem("indeps", IndepVarComp("sigma", np.zeros(shape), units = "MPa"))
+    model.add_subsystem("con", StressConstraint(n_members = n_members, n_cases = n_cases, ks = ks, tension = 400., compression = [300., 350., 400., 300., 350.]))
+    model.connect("indeps.sigma", "con.sigma")
+    check_partials(model, **{"indeps.sigma": np.random.default_rng(1).uniform(-500, 500, shape)})
+
+
+@pytest.mark.parametrize("model", [lambda geometry: Truss_Model(geometry = geometry),
+                                   lambda geometry: Truss_Model(geometry = geometry, solver = "sparse"),
+                                   lambda geometry: Truss_V3_Model(geometry = geometry),
+                                   lambda geometry: Joints_Model(geometry = geometry)],
+                         ids = ["newton", "sparse", "V3", "joints"])
+def test_truss_models(model):
+    check_partials(model(seven_truss_geometry()), **{"indeps.A": np.linspace(.1, .4, 7)})
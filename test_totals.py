@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from openmdao.api import Problem
+from openmdao.utils.assert_utils import assert_check_totals
+from truss_builder import Truss_Model, Truss_V3_Model
+from truss_joints import Joints_Model
+from seven_truss_V4 import seven_truss_geometry
+
+
+@pytest.mark.parametrize("mode", ["fwd", "rev"])
+@pytest.mark.parametrize("model", [lambda geometry: Truss_Model(geometry = geometry),
+                                   lambda geometry: Truss_Model(geometry = geometry, solver = "sparse"),
+                                   lambda geometry: Truss_V3_Model(geometry = geometry),
+                                   lambda geometry: Joints_Model(geometry = geometry)],
+                         ids = ["newton", "sparse", "V3", "joints"])
+def test_sizing_totals(model, mode):
+    prob = Problem(model(seven_truss_geometry()), reports = None)
+    prob.model.add_design_var("indeps.A", lower = 0.001, upper = 100)
+    prob.model.add_design_var("indeps.ext")
+    prob.model.add_objective("obj_cmp.obj")
+    prob.model.add_constraint("con.con", lower = 0)
+    prob.setup(mode = mode, force_alloc_complex = True)
+    prob.set_solver_print(level = -1)
+    prob["indeps.A"] = np.linspace(.1, .4, 7)
+    prob.run_model()
+    data = prob.check_totals(method = "cs", compact_print = True, out_stream = None)
+    assert_check_totals(data, atol = 1e-6, rtol = 1e-6)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from openmdao.api import Problem
+from truss_builder import Truss_Model
+from seven_truss_V4 import seven_truss_geometry
+
+
+def sizing_problem(solver, cache_size):
+    prob = Problem(Truss_Model(geometry = seven_truss_geometry(), solver = solver, cache_size = cache_size), reports = None)
+    prob.model.add_design_var("indeps.A", lower = 0.001, upper = 100)
+    prob.model.add_design_var("indeps.ext")
+    prob.model.add_objective("obj_cmp.obj")
+    prob.model.add_constraint("con.con", lower = 0)
+    prob.setup(mode = "rev")
+    prob.set_solver_print(level = -1)
+    return prob
+
+
+def analyse(prob, areas, ext):
+    prob["indeps.A"] = areas
+    prob["indeps.ext"] = ext
+    prob.run_model()
+    totals = prob.compute_totals(of = ["con.con", "obj_cmp.obj"], wrt = ["indeps.A", "indeps.ext"])
+    return prob["cycle.truss.force"].copy(), prob["stress.sigma"].copy(), totals
+
+
+@pytest.mark.parametrize("solver", ["newton", "sparse"])
+def test_cache_hit_matches_miss(solver):
+    areas = np.linspace(.1, .4, 7)
+    cached = sizing_problem(solver, 16)
+    uncached = sizing_problem(solver, 0)
+
+    analyse(cached, areas, [4e7])
+    analyse(cached, areas * 2, [6e7])
+    hits = cached.model.cycle.nonlinear_solver.cache.hits
+    hit = analyse(cached, areas * 1.5, [4e7])
+    assert cached.model.cycle.nonlinear_solver.cache.hits == hits + 1
+
+    miss = analyse(uncached, areas * 1.5, [4e7])
+    np.testing.assert_allclose(hit[0], miss[0], rtol = 1e-12)
+    np.testing.assert_allclose(hit[1], miss[1], rtol = 1e-12)
+    for key in miss[2]:
+        np.testing.assert_allclose(hit[2][key], miss[2][key], rtol = 1e-10, atol = 1e-12)
@@ -0,0 +1,25 @@
+import numpy as np
+from openmdao.api import Problem, ScipyOptimizeDriver
+from truss_fsd import FullyStressedDriver
+from seven_truss_V4 import Truss_Analysis
+
+
+def sizing(driver):
+    prob = Problem(Truss_Analysis(), reports = None)
+    prob.driver = driver
+    prob.model.add_design_var("indeps.A", lower = 0.001, upper = 100)
+    prob.model.add_objective("obj_cmp.obj")
+    prob.model.add_constraint("con.con", lower = 0)
+    prob.setup(mode = "rev")
+    prob.set_solver_print(level = -1)
+    prob.run_driver()
+    return prob
+
+
+def test_fsd_matches_slsqp():
+    slsqp = sizing(ScipyOptimizeDriver(optimizer = "SLSQP", tol = 1e-9, maxiter = 500, disp = False))
+    fsd = sizing(FullyStressedDriver(disp = False))
+    assert not fsd.driver.fail
+    np.testing.assert_allclose(fsd["indeps.A"], slsqp["indeps.A"], rtol = 1e-6)
+    np.testing.assert_allclose(fsd["obj_cmp.obj"], slsqp["obj_cmp.obj"], rtol = 1e-8)
+    assert fsd.driver.iter_count == 2
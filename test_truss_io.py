@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from truss_builder import TrussGeometry
+from truss_io import save_truss, load_truss
+from truss_generators import pratt
+from seven_truss_V4 import seven_truss_geometry
+
+
+def two_case_geometry():
+    geometry = pratt(5)
+    loads = np.stack([np.stack([geometry.load_nodes, geometry.load_forces * scale, geometry.load_directions], axis = 1) for scale in (1., -.5)])
+    supports = np.stack([geometry.reaction_nodes, geometry.reaction_directions], axis = 1)
+    return TrussGeometry(geometry.nodes, geometry.members, supports, loads, areas = np.linspace(.1, 1., geometry.n_members))
+
+
+@pytest.mark.parametrize("geometry", [seven_truss_geometry, two_case_geometry], ids = ["seven", "two cases"])
+@pytest.mark.parametrize("suffix, mmap", [("", True), ("", False), (".npz", False)], ids = ["mmap", "read", "npz"])
+def test_round_trip(tmp_path, geometry, suffix, mmap):
+    saved = geometry()
+    path = str(tmp_path / f"truss{suffix}")
+    save_truss(path, saved)
+    loaded = load_truss(path, mmap = mmap)
+    for name in ("nodes", "members", "reaction_nodes", "reaction_directions", "load_nodes", "load_forces", "load_directions", "areas"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(saved, name), err_msg = name)
+    assert loaded.n_cases == saved.n_cases
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from openmdao.api import Problem
+from truss_builder import Truss_Model
+from truss_joints import plan_joints, Joints_Model
+from three_truss_V4 import three_truss_geometry
+from seven_truss_V4 import seven_truss_geometry
+
+
+@pytest.mark.parametrize("geometry", [three_truss_geometry, seven_truss_geometry], ids = ["three", "seven"])
+def test_plan_joints(geometry):
+    geometry = geometry()
+    steps = plan_joints(geometry)
+    n_forces = geometry.n_members + geometry.n_reactions
+    solved = []
+    for step in steps:
+        if step["node"] is None:
+            solved += step["unknown"]
+            continue
+        # every joint has at most two unknowns, and only uses forces solved before it
+        assert 1 <= len(step["unknown"]) <= 2
+        assert all(force in solved for force, _, _ in step["known"])
+        solved += [force for force, _, _ in step["unknown"]]
+    assert sorted(solved) == list(range(n_forces))
+
+
+@pytest.mark.parametrize("geometry", [three_truss_geometry, seven_truss_geometry], ids = ["three", "seven"])
+def test_joints_match_truss_system(geometry):
+    forces = []
+    for model, name in ((Joints_Model, "force.force"), (Truss_Model, "cycle.truss.force")):
+        prob = Problem(model(geometry = geometry()), reports = None)
+        prob.setup()
+        prob.set_solver_print(level = -1)
+        prob.run_model()
+        forces.append(prob[name].ravel())
+    np.testing.assert_allclose(forces[0], forces[1], rtol = 1e-9, atol = 1e-3)
@@ -1,7 +1,5 @@
 import numpy as np 
 from openmdao.api import ExplicitComponent, Problem, Group, IndepVarComp, ExecComp, NonlinearBlockGS, NewtonSolver, DirectSolver, ScipyOptimizeDriver
-import math
-from openmdao.api import ExplicitComponent, Problem, Group, IndepVarComp, ExecComp, NonlinearBlockGS, NewtonSolver, DirectSolver, ScipyOptimizeDriver
 
 class truss(ExplicitComponent):
 
@@ -36,62 +34,85 @@ class Node(ExplicitComponent):
         self.options.declare("n_known", desc = "Number of known forces acting on node")
         self.options.declare("n_unknown", desc = "Number of unknown trusses acting on node")
         self.options.declare("solve_first", default = "x", desc = "Tells component which direction to sum the forces in first")
+        self.options.declare("frame", default = 0., desc = "Angle in rad of the x axis the forces are summed along, every direction is measured from it")
 
     def setup(self):
         
         self.add_output("new_truss 1", units = "N", desc = "Force in first unknown truss")
         self.add_input("new_direction 1", units = "rad", desc = "Direction of first unknown force acting on node")
-        self.add_input("known_force 1", units = "N", desc = "First known force acting on node")
-        self.add_input("old_direction 1", units = "rad", desc = "Direction of first known force acting on node")
 
         if (self.options["n_unknown"] > 1):
             self.add_output("new_truss 2", units = "N", desc = "Force in second unknown truss")
             self.add_input("new_direction 2", units = "rad", desc = "Direction of second unknown force acting on node")
-        
-        if (self.options["n_known"] > 1):
-            self.add_input("known_force 2", units = "N", desc = "Second known force acting on node")
-            self.add_input("old_direction 2", units = "rad", desc = "Direction of second known force acting on node")
 
-#What should I take for derivatives?
-        self.declare_partials("new_truss*", "known_force*", method = "fd")
-        self.declare_partials("new_truss*", "old_direction*", method = "fd")
-        self.declare_partials("new_truss*", "new_direction*", method = "fd")
+        for i in range(self.options["n_known"]):
+            self.add_input(f"known_force {i + 1}", units = "N", desc = f"Known force {i + 1} acting on node")
+            self.add_input(f"old_direction {i + 1}", units = "rad", desc = f"Direction of known force {i + 1} acting on node")
 
-    def compute(self, inputs, outputs):
-        forces = [0]
-        forces[0] = inputs["known_force 1"]
-        old_directions = [0]
-        old_directions[0] = inputs["old_direction 1"]
-        new_directions = [0]
-        new_directions[0] = inputs["new_direction 1"]
+        # new_truss 1 only depends on the first new direction, new_truss 2 also depends on new_truss 1
+        self.declare_partials("new_truss 1", "new_direction 1")
         if (self.options["n_unknown"] > 1):
-            new_directions.append(inputs["new_direction 2"])
-        if (self.options["n_known"] > 1):
-            forces.append(inputs["known_force 2"])
-            old_directions.append(inputs["old_direction 2"])
+            self.declare_partials("new_truss 2", "new_direction*")
+        if (self.options["n_known"] > 0):
+            self.declare_partials("new_truss*", "known_force*")
+            self.declare_partials("new_truss*", "old_direction*")
 
+    def _trig(self):
+        # f is summed first to find new_truss 1, g is summed second to find new_truss 2, df and dg are their derivatives
+        if (self.options["solve_first"] == "x"):
+            return np.cos, lambda a: -np.sin(a), np.sin, np.cos
+        return np.sin, np.cos, np.cos, lambda a: -np.sin(a)
 
+    def _unpack(self, inputs):
+        frame = self.options["frame"]
+        forces = [inputs[f"known_force {i + 1}"] for i in range(self.options["n_known"])]
+        old_directions = [inputs[f"old_direction {i + 1}"] - frame for i in range(self.options["n_known"])]
+        new_directions = [inputs[f"new_direction {i + 1}"] - frame for i in range(self.options["n_unknown"])]
+        return forces, old_directions, new_directions
 
-        if (self.options["solve_first"] == "x"):
-            x_sum = 0
+    def compute(self, inputs, outputs):
+        forces, old_directions, new_directions = self._unpack(inputs)
+        f, df, g, dg = self._trig()
+
+        # sum the forces in the first direction, which only the first unknown truss has a component in
+        f_sum = 0
+        for i in range(self.options["n_known"]):
+            f_sum += forces[i] * f(old_directions[i])
+        outputs["new_truss 1"] = -f_sum / f(new_directions[0])
+
+        # sum the forces in the second direction, now including the first unknown truss
+        if (self.options["n_unknown"] > 1):
+            g_sum = 0
             for i in range(self.options["n_known"]):
-                x_sum += forces[i] * math.cos(old_directions[i])
-            outputs["new_truss 1"] = -x_sum / math.cos(new_directions[0])
+                g_sum += forces[i] * g(old_directions[i])
+            g_sum += outputs["new_truss 1"] * g(new_directions[0])
+            outputs["new_truss 2"] = -g_sum / g(new_directions[1])
+
+    def compute_partials(self, inputs, J):
+        forces, old_directions, new_directions = self._unpack(inputs)
+        f, df, g, dg = self._trig()
+
+        new_truss_1 = 0
+        for i in range(self.options["n_known"]):
+            new_truss_1 -= forces[i] * f(old_directions[i]) / f(new_directions[0])
+
+        # chain rule through new_truss 1 for the second unknown truss
+        for i in range(self.options["n_known"]):
+            known_force = f"known_force {i + 1}"
+            old_direction = f"old_direction {i + 1}"
+            d1_force = -f(old_directions[i]) / f(new_directions[0])
+            d1_direction = -forces[i] * df(old_directions[i]) / f(new_directions[0])
+            J["new_truss 1", known_force] = d1_force
+            J["new_truss 1", old_direction] = d1_direction
             if (self.options["n_unknown"] > 1):
-                y_sum = 0
-                for i in range(self.options["n_known"]):
-                    y_sum += forces[i] * math.sin(old_directions[i])
-                y_sum += outputs["new_truss 1"] * math.sin(new_directions[0])
-                outputs["new_truss 2"] = -y_sum / math.sin(new_directions[1])
-
-        else:
-            y_sum = 0
+                J["new_truss 2", known_force] = -(g(old_directions[i]) + d1_force * g(new_directions[0])) / g(new_directions[1])
+                J["new_truss 2", old_direction] = -(forces[i] * dg(old_directions[i]) + d1_direction * g(new_directions[0])) / g(new_directions[1])
+
+        d1_new = -new_truss_1 * df(new_directions[0]) / f(new_directions[0])
+        J["new_truss 1", "new_direction 1"] = d1_new
+        if (self.options["n_unknown"] > 1):
+            g_sum = new_truss_1 * g(new_directions[0])
             for i in range(self.options["n_known"]):
-                y_sum += forces[i] * math.sin(old_directions[i])
-            outputs["new_truss 1"] = -y_sum / math.sin(new_directions[0])
-            if (self.options["n_unknown"] > 1):
-                x_sum = 0
-                for i in range(self.options["n_known"]):
-                    x_sum += forces[i] * math.cos(old_directions[i])
-                x_sum += outputs["new_truss 1"] * math.cos(new_directions[0])
-                outputs["new_truss 2"] = -x_sum / math.cos(new_directions[1])
\ No newline at end of file
+                g_sum += forces[i] * g(old_directions[i])
+            J["new_truss 2", "new_direction 1"] = -(d1_new * g(new_directions[0]) + new_truss_1 * dg(new_directions[0])) / g(new_directions[1])
+            J["new_truss 2", "new_direction 2"] = g_sum * dg(new_directions[1]) / g(new_directions[1]) ** 2
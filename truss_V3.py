@@ -11,10 +11,11 @@ class Beam(ImplicitComponent):
         self.add_output("beam_force", val = 1., units = "N", desc = "Force in the beam")
         self.add_output('sigma', val=1, units='MPa')
 
-        # declare necessary partials
-        self.declare_partials("beam_force", "force*")
+        # declare necessary partials, the force balance and the stress identity term are constant
+        self.declare_partials("beam_force", "force0", val = 1.)
+        self.declare_partials("beam_force", "force1", val = -1.)
         self.declare_partials("sigma", "beam_force")
-        self.declare_partials("sigma", "sigma")
+        self.declare_partials("sigma", "sigma", val = 1.)
         self.declare_partials("sigma", "A")
 
     def apply_nonlinear(self, inputs, outputs, residuals):
@@ -28,12 +29,8 @@ class Beam(ImplicitComponent):
 
 
     def linearize(self, inputs, outputs, partials):
-        # analytic partial derivatives of beam_force residual
-        partials["beam_force", "force0"] = 1
-        partials["beam_force", "force1"] = -1
         # analytic partial derivatives of sigma residual
         partials["sigma", "beam_force"] = -1 / (1e6 * inputs["A"])
-        partials["sigma", "sigma"] = 1
         partials["sigma", "A"] = outputs["beam_force"] / (1e6 * (inputs["A"]) ** 2)
     
 
@@ -60,9 +57,6 @@ class Node(ImplicitComponent):
             self.add_output(n_reaction, units = "N", desc = "Output load on node")
             self.add_input(n_direction, units = "rad", desc = "Direction of load on node")
 
-            if (self.options["n_external_forces"] > 0):
-                self.declare_partials(n_reaction, "force*")
-
         # add beams as load outputs and load inputs, add their directions as inputs
         for i in range(self.options["n_loads"]):
             n_load_out = f"load_out{i}"
@@ -72,115 +66,80 @@ class Node(ImplicitComponent):
             self.add_input(n_direction, units = "rad", desc = "Direction of load on node")
             self.add_input(n_load_in, units = "N", desc = "Input load on node")
 
-        # declare partials for reaction outputs
-        if (self.options["n_reactions"] > 0):
-            self.declare_partials("reaction*", "reaction*")
-            self.declare_partials("reaction*", "load_out*")
-            self.declare_partials("reaction*", "direction*")
-
-        # declare partials for beams whose residuals have a force balance
-        for j in range(2 - self.options["n_reactions"]):
-            n_load_out = f"load_out{j}"
-            self.declare_partials(n_load_out, "load_out*")
-            self.declare_partials(n_load_out, "direction*")
-
-            if (self.options["n_reactions"] > 0):
-                self.declare_partials(n_load_out, "reaction*")
-
-            if (self.options["n_external_forces"] > 0):
-                self.declare_partials(n_load_out, "*ext")
-
-        # declare partials for beams whose residuals do not have a force balance
-        for k in range((2 - self.options["n_reactions"]), self.options["n_loads"]):
+        # the first two residuals hold the force balance, they belong to reactions if they exist, and beams if they don't
+        n_reactions = self.options["n_reactions"]
+        self._res = [f"reaction{m}" for m in range(n_reactions)] + [f"load_out{j}" for j in range(2 - n_reactions)]
+
+        # declare each force balance partial explicitly, against exactly the forces and directions acting on the node
+        balance_wrt = [f"load_out{i}" for i in range(self.options["n_loads"])]
+        balance_wrt += [f"direction{i}_load" for i in range(self.options["n_loads"])]
+        balance_wrt += [f"reaction{m}" for m in range(n_reactions)]
+        balance_wrt += [f"direction{m}_reaction" for m in range(n_reactions)]
+        balance_wrt += [f"force{n}_ext" for n in range(self.options["n_external_forces"])]
+        balance_wrt += [f"direction{n}_ext" for n in range(self.options["n_external_forces"])]
+        for res in self._res:
+            for wrt in balance_wrt:
+                self.declare_partials(res, wrt)
+
+        # beams whose residuals do not have a force balance just pass their load through, with constant partials
+        self._passing = list(range((2 - n_reactions), self.options["n_loads"]))
+        for k in self._passing:
             n_load_out = f"load_out{k}"
             n_load_in = f"load_in{k}"
-            self.declare_partials(n_load_out, n_load_out)
-            self.declare_partials(n_load_out, n_load_in)
-
+            self.declare_partials(n_load_out, n_load_out, val = 1.)
+            self.declare_partials(n_load_out, n_load_in, val = -1.)
+
+        # every force on the node, beams, reactions then external forces, with the direction it acts in
+        self._forces = [f"load_out{i}" for i in range(self.options["n_loads"])] + [f"reaction{m}" for m in range(n_reactions)]
+        self._forces += [f"force{n}_ext" for n in range(self.options["n_external_forces"])]
+        self._directions = [f"direction{i}_load" for i in range(self.options["n_loads"])] + [f"direction{m}_reaction" for m in range(n_reactions)]
+        self._directions += [f"direction{n}_ext" for n in range(self.options["n_external_forces"])]
+        self._keys = [(res, wrt) for res in self._res for wrt in self._forces + self._directions]
+        self._force_out = None
+
+
+    def _tables(self, inputs, outputs):
+        # positions of every force, direction and residual in the flat vectors of this node, in vector order, so a
+        # residual or jacobian evaluation is a handful of array operations instead of a loop over string names
+        in_idx = {name: i for i, name in enumerate(inputs.keys())}
+        out_idx = {name: i for i, name in enumerate(outputs.keys())}
+        self._force_out = np.array([out_idx[name] for name in self._forces if name in out_idx], dtype = int)
+        self._force_in = np.array([in_idx[name] for name in self._forces if name not in out_idx], dtype = int)
+        self._direction_in = np.array([in_idx[name] for name in self._directions], dtype = int)
+        self._balance = np.array([out_idx[name] for name in self._res], dtype = int)
+        self._pass_out = np.array([out_idx[f"load_out{q}"] for q in self._passing], dtype = int)
+        self._pass_in = np.array([in_idx[f"load_in{q}"] for q in self._passing], dtype = int)
+        self._trig_key = None
+
+    def _trig(self, directions):
+        # directions are constant during an analysis, so their cosines and sines are only recomputed when they change
+        if self._trig_key is None or self._trig_key.dtype != directions.dtype or not np.array_equal(self._trig_key, directions):
+            self._trig_key = directions.copy()
+            self._cos = np.cos(directions)
+            self._sin = np.sin(directions)
+        return self._cos, self._sin
+
+    def _unpack(self, inputs, outputs):
+        if self._force_out is None:
+            self._tables(inputs, outputs)
+        x_in = inputs.asarray()
+        forces = np.concatenate([outputs.asarray()[self._force_out], x_in[self._force_in]])
+        return forces, self._trig(x_in[self._direction_in])
 
     def apply_nonlinear(self, inputs, outputs, residuals):
-        # set the first two residuals to correspond with reactions if they exist, and beams if they don't
-        res = ["string", "string"]
-        for n in range(self.options["n_reactions"]):
-            reaction = f"reaction{n}"
-            res[n] = reaction   
+        forces, (cos, sin) = self._unpack(inputs, outputs)
+        r = residuals.asarray()
 
-        for m in range(0, 2 - self.options["n_reactions"]):
-            load_out = f"load_out{m}"
-            res[self.options["n_reactions"] - m] = load_out 
-
-        # set initials value of first two residuals to zero
-        residuals[res[0]] = 0
-        residuals[res[1]] = 0
-
-        # sum beam forces in x and y directions on node
-        for i in range(self.options["n_loads"]):
-            load = f"load_out{i}"
-            direction = f"direction{i}_load"
-            residuals[res[0]] += outputs[load] * np.cos(inputs[direction])
-            residuals[res[1]] += outputs[load] * np.sin(inputs[direction])
-
-        # sum reaction forces in x and y directions on node
-        for j in range(self.options["n_reactions"]):
-            reaction = f"reaction{j}"
-            direction = f"direction{j}_reaction"
-            residuals[res[0]] += outputs[reaction] * np.cos(inputs[direction])
-            residuals[res[1]] += outputs[reaction] * np.sin(inputs[direction])
-
-        # sum external forces in x and y directions on node
-        for k in range(self.options["n_external_forces"]):
-            force = f"force{k}_ext"
-            direction = f"direction{k}_ext"
-            residuals[res[0]] += inputs[force] * np.cos(inputs[direction])
-            residuals[res[1]] += inputs[force] * np.sin(inputs[direction])
+        # sum beam, reaction and external forces in x and y directions on node
+        r[self._balance] = forces @ cos, forces @ sin
 
         # set output forces equal to inputs for remaining residuals
-        for q in range((2 - self.options["n_reactions"]), self.options["n_loads"]):
-            load_in = f"load_in{q}"
-            load_out = f"load_out{q}"
-            residuals[load_out] = outputs[load_out] - inputs[load_in]
+        r[self._pass_out] = outputs.asarray()[self._pass_out] - inputs.asarray()[self._pass_in]
 
     def linearize(self, inputs, outputs, partials):
-        # identify first two residuals
-        res = ["string", "string"]
-        for n in range(self.options["n_reactions"]):
-            reaction = f"reaction{n}"
-            res[n] = reaction   
+        forces, (cos, sin) = self._unpack(inputs, outputs)
 
-        for m in range(0, 2 - self.options["n_reactions"]):
-            load_out = f"load_out{m}"
-            res[self.options["n_reactions"] - m] = load_out 
-
-        # compute partials for first two residuals wrt beams and their directions
-        for i in range(self.options["n_loads"]):
-            load = f"load_out{i}"
-            direction = f"direction{i}_load"
-            partials[res[0], load] = np.cos(inputs[direction])
-            partials[res[0], direction] = -outputs[load] * np.sin(inputs[direction])
-            partials[res[1], load] = np.sin(inputs[direction])
-            partials[res[1], direction] = outputs[load] * np.cos(inputs[direction])
-
-        # compute partials for first two residuals wrt reactions and their directions
-        for j in range(self.options["n_reactions"]):
-            reaction = f"reaction{j}"
-            direction = f"direction{j}_reaction"
-            partials[res[0], reaction] = np.cos(inputs[direction])
-            partials[res[0], direction] = -outputs[reaction] * np.sin(inputs[direction])
-            partials[res[1], reaction] = np.sin(inputs[direction])
-            partials[res[1], direction] = outputs[reaction] * np.cos(inputs[direction])
-
-        # compute partials for first two residuals wrt external forces and their directions
-        for k in range(self.options["n_external_forces"]):
-            force = f"force{k}_ext"
-            direction = f"direction{k}_ext"
-            partials[res[0], force] = np.cos(inputs[direction])
-            partials[res[0], direction] = -inputs[force] * np.sin(inputs[direction])
-            partials[res[1], force] = np.sin(inputs[direction])
-            partials[res[1], direction] = inputs[force] * np.cos(inputs[direction])
-
-        # compute partials for remaining residuals
-        for q in range((2 - self.options["n_reactions"]), self.options["n_loads"]):
-            load_out = f"load_out{q}"
-            load_in = f"load_in{q}"
-            partials[load_out, load_out] = 1
-            partials[load_out, load_in] = -1
\ No newline at end of file
+        # partials of the two force balances wrt every force and direction, in the order of self._keys
+        values = np.concatenate([cos, -forces * sin, sin, forces * cos])
+        for key, value in zip(self._keys, values):
+            partials[key] = value
@@ -0,0 +1,304 @@
+import numpy as np
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import splu
+from openmdao.api import ExplicitComponent, ImplicitComponent, Problem, Group, IndepVarComp, ExecComp, NewtonSolver, DirectSolver, ScipyOptimizeDriver, AnalysisError
+from truss_kernels import check_backend, equilibrium_residual, equilibrium_partials, member_stress, member_stress_partials
+
+
+def member_pattern(members):
+    # rows of the x and y equilibrium equations at both ends of every member, in (x0, y0, x1, y1) order
+    members = np.asarray(members, dtype = int).reshape(-1, 2)
+    rows = np.column_stack([2 * members[:, 0], 2 * members[:, 0] + 1, 2 * members[:, 1], 2 * members[:, 1] + 1]).ravel()
+    cols = np.repeat(np.arange(len(members)), 4)
+    return rows, cols
+
+def point_pattern(nodes):
+    # rows of the x and y equilibrium equations for forces acting on single nodes, in (x, y) order
+    nodes = np.asarray(nodes, dtype = int).ravel()
+    rows = np.column_stack([2 * nodes, 2 * nodes + 1]).ravel()
+    cols = np.repeat(np.arange(len(nodes)), 2)
+    return rows, cols
+
+def member_values(direction):
+    cos_m = np.cos(direction)
+    sin_m = np.sin(direction)
+    return np.column_stack([cos_m, sin_m, -cos_m, -sin_m]).ravel()
+
+def point_values(direction):
+    return np.column_stack([np.cos(direction), np.sin(direction)]).ravel()
+
+def case_pattern(rows, cols, n_rows, n_cols, n_cases):
+    # repeat a single load case sparsity pattern for every case, offsetting rows and columns by the size of one
+    # case, n_cols = 0 for inputs shared by every case
+    offsets = np.arange(n_cases)[:, np.newaxis]
+    return (rows + n_rows * offsets).ravel(), (cols + n_cols * offsets).ravel()
+
+def case_shape(n_cases, n):
+    # a single load case keeps flat vectors, several load cases add a leading case axis
+    return (n,) if n_cases == 1 else (n_cases, n)
+
+def equilibrium_matrix(n_nodes, members, directions, reaction_nodes = (), reaction_directions = ()):
+    # global 2N x (M + R) equilibrium matrix, columns are member forces followed by reactions
+    member_rows, member_cols = member_pattern(members)
+    reaction_rows, reaction_cols = point_pattern(reaction_nodes)
+    n_members = len(member_cols) // 4
+    n_reactions = len(reaction_cols) // 2
+    rows = np.concatenate([member_rows, reaction_rows])
+    cols = np.concatenate([member_cols, reaction_cols + n_members])
+    vals = np.concatenate([member_values(directions), point_values(reaction_directions)])
+    return csc_matrix((vals, (rows, cols)), shape = (2 * n_nodes, n_members + n_reactions))
+
+
+class TrussSystem(ImplicitComponent):
+
+    def initialize(self):
+        # user specifies truss topology, every force is vectorized over members, reactions and external forces
+        self.options.declare("n_nodes", types = int, desc = "Number of nodes in the truss")
+        self.options.declare("members", desc = "(n_members, 2) array of the node at the 0th and 1st end of each member")
+        self.options.declare("reaction_nodes", default = [], desc = "Node that each reaction acts on")
+        self.options.declare("load_nodes", default = [], desc = "Node that each external force acts on")
+        self.options.declare("n_cases", default = 1, types = int, desc = "Number of load cases solved together, each with its own external forces")
+        self.options.declare("backend", default = None, desc = "Kernel backend from truss_kernels, numpy or numba, None for the default")
+
+    def setup(self):
+        check_backend(self.options["backend"])
+        members = np.asarray(self.options["members"], dtype = int).reshape(-1, 2)
+        reaction_nodes = np.asarray(self.options["reaction_nodes"], dtype = int).ravel()
+        load_nodes = np.asarray(self.options["load_nodes"], dtype = int).ravel()
+        n_nodes = self.options["n_nodes"]
+        n_members = len(members)
+        n_reactions = len(reaction_nodes)
+        n_loads = len(load_nodes)
+
+        # nodal equilibrium gives 2 equations per node, which must match the number of unknown forces
+        if (2 * n_nodes != n_members + n_reactions):
+            raise ValueError(f"{self.msginfo}: truss is not statically determinate, {2 * n_nodes} equilibrium equations "
+                             f"for {n_members} members and {n_reactions} reactions.")
+
+        n_cases = self.options["n_cases"]
+        n_forces = n_members + n_reactions
+
+        # geometry is shared by every load case, external forces and the resulting forces are per case
+        self.add_input("direction", val = np.zeros(n_members), units = "rad", desc = "Direction of each member from its 0th end to its 1st end")
+        self.add_input("reaction_direction", val = np.zeros(n_reactions), units = "rad", desc = "Direction of each reaction force")
+        self.add_input("ext", val = np.zeros(case_shape(n_cases, n_loads)), units = "N", desc = "External forces applied to the truss in each load case")
+        self.add_input("ext_direction", val = np.zeros(case_shape(n_cases, n_loads)), units = "rad", desc = "Direction of each external force in each load case")
+
+        # member forces and reactions are one state vector, since the equilibrium equations couple all of them
+        self.add_output("force", val = np.ones(case_shape(n_cases, n_forces)), units = "N", desc = "Force in each member followed by each reaction force, for each load case")
+
+        # rows of the x and y equilibrium equations of every node each force acts on
+        self._member_rows, self._member_cols = member_pattern(members)
+        self._reaction_rows, self._reaction_cols = point_pattern(reaction_nodes)
+        self._load_rows, self._load_cols = point_pattern(load_nodes)
+        self._members = members
+        self._reaction_nodes = reaction_nodes
+        self._load_nodes = load_nodes
+        self._n_members = n_members
+        self._n_cases = n_cases
+
+        self._force_rows = np.concatenate([self._member_rows, self._reaction_rows])
+        self._force_cols = np.concatenate([self._member_cols, self._reaction_cols + n_members])
+
+        # every load case has its own block of equilibrium equations with the same equilibrium matrix
+        n_eq = 2 * n_nodes
+        rows, cols = case_pattern(self._force_rows, self._force_cols, n_eq, n_forces, n_cases)
+        self.declare_partials("force", "force", rows = rows, cols = cols)
+        rows, cols = case_pattern(self._member_rows, self._member_cols, n_eq, 0, n_cases)
+        self.declare_partials("force", "direction", rows = rows, cols = cols)
+        if n_reactions > 0:
+            rows, cols = case_pattern(self._reaction_rows, self._reaction_cols, n_eq, 0, n_cases)
+            self.declare_partials("force", "reaction_direction", rows = rows, cols = cols)
+        if n_loads > 0:
+            rows, cols = case_pattern(self._load_rows, self._load_cols, n_eq, n_loads, n_cases)
+            self.declare_partials("force", "ext", rows = rows, cols = cols)
+            self.declare_partials("force", "ext_direction", rows = rows, cols = cols)
+
+    def _load_values(self, inputs):
+        # x and y components of every external force, one row per load case
+        ext = inputs["ext"].reshape(self._n_cases, -1)
+        ext_direction = inputs["ext_direction"].reshape(self._n_cases, -1)
+        return (point_values(ext_direction.ravel()) * np.repeat(ext.ravel(), 2)).reshape(self._n_cases, -1)
+
+    def _kernel_args(self, inputs, outputs):
+        return (inputs["direction"], inputs["reaction_direction"], inputs["ext"].reshape(self._n_cases, -1),
+                inputs["ext_direction"].reshape(self._n_cases, -1), outputs["force"].reshape(self._n_cases, -1))
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        # sum member, reaction and external forces in x and y at every node
+        eq = equilibrium_residual(self.options["n_nodes"], self._members, self._reaction_nodes, self._load_nodes,
+                                  *self._kernel_args(inputs, outputs), backend = self.options["backend"])
+        residuals["force"] = eq.reshape(residuals["force"].shape)
+
+    def linearize(self, inputs, outputs, partials):
+        # values follow the same (case, x0, y0, x1, y1) ordering used for the declared rows
+        d_force, d_direction, d_reaction_direction, d_ext, d_ext_direction = equilibrium_partials(
+            self._n_members, *self._kernel_args(inputs, outputs), backend = self.options["backend"])
+
+        partials["force", "force"] = d_force
+        partials["force", "direction"] = d_direction
+        if len(self._reaction_nodes) > 0:
+            partials["force", "reaction_direction"] = d_reaction_direction
+        if len(self._load_nodes) > 0:
+            partials["force", "ext"] = d_ext
+            partials["force", "ext_direction"] = d_ext_direction
+
+
+class SparseTrussSystem(TrussSystem):
+
+    # solves the equilibrium equations with one sparse LU factorization of the equilibrium matrix instead of
+    # Newton iterations, and reuses that factorization for every load case and for the linear solves of the
+    # derivative computation
+
+    def _factorize(self, inputs):
+        vals = np.concatenate([member_values(inputs["direction"]), point_values(inputs["reaction_direction"])])
+        n_eq = 2 * self.options["n_nodes"]
+        try:
+            self._lu = splu(csc_matrix((vals, (self._force_rows, self._force_cols)), shape = (n_eq, n_eq)))
+        except RuntimeError as err:
+            raise AnalysisError(f"{self.msginfo}: equilibrium matrix is singular, the truss is a mechanism ({err}).")
+
+    def _solve(self, rhs, trans = "N"):
+        # one column per load case, all solved with the same factors
+        x = self._lu.solve(np.ascontiguousarray(rhs.reshape(self._n_cases, -1).T), trans = trans)
+        return x.T.reshape(rhs.shape)
+
+    def solve_nonlinear(self, inputs, outputs):
+        self._factorize(inputs)
+
+        # external forces move to the right hand side, member forces and reactions come out of one solve
+        load_vals = self._load_values(inputs)
+        rhs = np.zeros((self._n_cases, 2 * self.options["n_nodes"]), dtype = load_vals.dtype)
+        np.add.at(rhs, (slice(None), self._load_rows), -load_vals)
+        outputs["force"] = self._solve(rhs).reshape(outputs["force"].shape)
+
+    def linearize(self, inputs, outputs, partials):
+        super().linearize(inputs, outputs, partials)
+        self._factorize(inputs)
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        # the state jacobian is the equilibrium matrix itself, repeated for every load case
+        if mode == "fwd":
+            d_outputs["force"] = self._solve(d_residuals["force"])
+        else:
+            d_residuals["force"] = self._solve(d_outputs["force"], trans = "T")
+
+
+class MemberStress(ExplicitComponent):
+
+    # stresses are computed outside the equilibrium solve, so derivatives wrt area never need a linear solve
+
+    def initialize(self):
+        self.options.declare("n_members", types = int, desc = "Number of members in the truss")
+        self.options.declare("n_reactions", default = 0, types = int, desc = "Number of reaction forces trailing the member forces")
+        self.options.declare("n_cases", default = 1, types = int, desc = "Number of load cases")
+        self.options.declare("backend", default = None, desc = "Kernel backend from truss_kernels, numpy or numba, None for the default")
+
+    def setup(self):
+        check_backend(self.options["backend"])
+        n_members = self.options["n_members"]
+        n_forces = n_members + self.options["n_reactions"]
+        n_cases = self.options["n_cases"]
+        self.add_input("force", val = np.ones(case_shape(n_cases, n_forces)), units = "N", desc = "Force in each member followed by each reaction force, for each load case")
+        self.add_input("A", val = np.ones(n_members), units = "m**2", desc = "Cross sectional area of each member")
+        self.add_output("sigma", val = np.ones(case_shape(n_cases, n_members)), units = "MPa", desc = "Stress in each member for each load case")
+
+        diag = np.arange(n_members)
+        rows, cols = case_pattern(diag, diag, n_members, n_forces, n_cases)
+        self.declare_partials("sigma", "force", rows = rows, cols = cols)
+        rows, cols = case_pattern(diag, diag, n_members, 0, n_cases)
+        self.declare_partials("sigma", "A", rows = rows, cols = cols)
+
+    def _force(self, inputs):
+        return inputs["force"].reshape(self.options["n_cases"], -1)
+
+    def compute(self, inputs, outputs):
+        sigma = member_stress(self.options["n_members"], self._force(inputs), inputs["A"], backend = self.options["backend"])
+        outputs["sigma"] = sigma.reshape(outputs["sigma"].shape)
+
+    def compute_partials(self, inputs, J):
+        J["sigma", "force"], J["sigma", "A"] = member_stress_partials(self.options["n_members"], self._force(inputs), inputs["A"],
+                                                                      backend = self.options["backend"])
+
+
+class StressConstraint(ExplicitComponent):
+
+    # per member stress margins against separate tension and compression allowables, optionally aggregated into
+    # one Kreisselmeier-Steinhauser constraint so the optimizer sees a single smooth constraint for the whole truss
+
+    def initialize(self):
+        self.options.declare("n_members", types = int, desc = "Number of members in the truss")
+        self.options.declare("n_cases", default = 1, types = int, desc = "Number of load cases")
+        self.options.declare("tension", default = 400., desc = "Allowable tensile stress in MPa, scalar or one per member")
+        self.options.declare("compression", default = 400., desc = "Allowable compressive stress magnitude in MPa, scalar or one per member")
+        self.options.declare("ks", default = False, types = bool, desc = "Also compute the KS aggregate of every margin in every load case")
+        self.options.declare("rho", default = 50., desc = "KS aggregation parameter, larger values follow the most critical margin more closely")
+
+    def setup(self):
+        n_members = self.options["n_members"]
+        n_cases = self.options["n_cases"]
+        shape = case_shape(n_cases, n_members)
+        self._tension = np.broadcast_to(np.asarray(self.options["tension"], dtype = float), (n_members,))
+        self._compression = np.broadcast_to(np.asarray(self.options["compression"], dtype = float), (n_members,))
+
+        self.add_input("sigma", val = np.zeros(shape), units = "MPa", desc = "Stress in each member for each load case, positive in tension")
+        self.add_output("con", val = np.zeros(shape), units = "MPa", desc = "Margin of each member to its allowable stress, feasible when >= 0")
+
+        diag = np.arange(n_members * n_cases)
+        self.declare_partials("con", "sigma", rows = diag, cols = diag)
+
+        if self.options["ks"]:
+            self.add_output("con_ks", val = 0., desc = "KS lower bound of the normalized margins of every member, feasible when >= 0")
+            self.declare_partials("con_ks", "sigma")
+
+    def _ks(self, sigma):
+        # failure indices in tension and compression, both <= 0 when the member is feasible
+        g = np.concatenate([sigma / self._tension - 1, -sigma / self._compression - 1], axis = -1)
+        g_max = np.max(g.real)
+        w = np.exp(self.options["rho"] * (g - g_max))
+        return g_max + np.log(np.sum(w)) / self.options["rho"], w / np.sum(w)
+
+    def compute(self, inputs, outputs):
+        sigma = inputs["sigma"]
+        outputs["con"] = np.where(sigma.real >= 0, self._tension - sigma, self._compression + sigma)
+        if self.options["ks"]:
+            outputs["con_ks"] = -self._ks(sigma.reshape(self.options["n_cases"], -1))[0]
+
+    def compute_partials(self, inputs, J):
+        sigma = inputs["sigma"]
+        J["con", "sigma"] = np.where(sigma.real >= 0, -1., 1.).ravel()
+        if self.options["ks"]:
+            n_members = self.options["n_members"]
+            weights = self._ks(sigma.reshape(self.options["n_cases"], -1))[1]
+            J["con_ks", "sigma"] = -(weights[:, :n_members] / self._tension - weights[:, n_members:] / self._compression).ravel()
+
+
+class StructuralMass(ExplicitComponent):
+
+    # structural volume sum(A * L), or mass sum(rho * A * L) when densities are given, for any number of members
+
+    def initialize(self):
+        self.options.declare("n_members", types = int, desc = "Number of members in the truss")
+        self.options.declare("density", default = None, desc = "Density of each member in kg/m**3, scalar or one per member, None for volume")
+
+    def setup(self):
+        n_members = self.options["n_members"]
+        density = self.options["density"]
+        self._density = np.broadcast_to(np.asarray(1. if density is None else density, dtype = float), (n_members,))
+
+        self.add_input("A", val = np.ones(n_members), units = "m**2", desc = "Cross sectional area of each member")
+        self.add_input("L", val = np.ones(n_members), units = "m", desc = "Length of each member")
+        self.add_output("obj", val = 0., units = "m**3" if density is None else "kg", desc = "Structural volume or mass")
+
+        # one row, one column per member
+        rows = np.zeros(n_members, dtype = int)
+        cols = np.arange(n_members)
+        self.declare_partials("obj", "A", rows = rows, cols = cols)
+        self.declare_partials("obj", "L", rows = rows, cols = cols)
+
+    def compute(self, inputs, outputs):
+        outputs["obj"] = np.dot(self._density * inputs["A"], inputs["L"])
+
+    def compute_partials(self, inputs, J):
+        J["obj", "A"] = self._density * inputs["L"]
+        J["obj", "L"] = self._density * inputs["A"]
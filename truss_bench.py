@@ -0,0 +1,185 @@
+import io
+import re
+import sys
+import json
+import time
+import platform
+import argparse
+import warnings
+import contextlib
+import importlib
+import tracemalloc
+import numpy as np
+import openmdao
+from openmdao.api import Problem, ScipyOptimizeDriver
+
+# script, formulation and how its main sets up the problem. V1 prescribes the member forces and approximates totals
+# like its scripts do, V2 chains explicit Nodes, V3 and diff solve implicit Nodes and Beams with Newton and V4 solves
+# one vectorized TrussSystem, all three with total coloring in reverse mode.
+SCRIPTS = [
+    ("two_truss", "V1"), ("three_truss", "V1"), ("five_truss", "V1"), ("seven_truss", "V1"),
+    ("three_truss_V2", "V2"), ("five_truss_V2", "V2"), ("seven_truss_V2", "V2"),
+    ("two_truss_V3", "V3"), ("three_truss_V3", "V3"), ("five_truss_V3", "V3"), ("seven_truss_V3", "V3"),
+    ("diff_five_truss", "diff"), ("diff_seven_truss", "diff"),
+    ("seven_truss_V4", "V4"),
+]
+SETTINGS = {
+    "V1": {"approx_totals": True, "coloring": False, "mode": "auto"},
+    "V2": {"approx_totals": False, "coloring": False, "mode": "auto"},
+    "V3": {"approx_totals": False, "coloring": True, "mode": "rev"},
+    "diff": {"approx_totals": False, "coloring": True, "mode": "rev"},
+    "V4": {"approx_totals": False, "coloring": True, "mode": "rev"},
+}
+
+
+def _problem_names(model_class):
+    # every script names its areas indeps.A*, its stress constraints con*.con and its objective obj_cmp.obj
+    prob = Problem(model_class(), reports = None)
+    prob.setup()
+    prob.final_setup()
+    outputs = list(prob.model.get_io_metadata(iotypes = "output"))
+    return [name for name in outputs if re.fullmatch(r"indeps\.A\d*", name)], [name for name in outputs if re.fullmatch(r"con\d*\.con", name)]
+
+def _build(model_class, settings, names, driver):
+    design_vars, constraints = names
+    prob = Problem(model_class(), reports = None)
+    if driver:
+        prob.driver = ScipyOptimizeDriver(optimizer = "SLSQP", disp = False)
+        if settings["coloring"]:
+            prob.driver.declare_coloring()
+    for name in design_vars:
+        prob.model.add_design_var(name, lower = 0.001, upper = 100)
+    prob.model.add_objective("obj_cmp.obj")
+    for name in constraints:
+        prob.model.add_constraint(name, lower = 0)
+    if settings["approx_totals"]:
+        prob.model.approx_totals()
+    prob.setup(mode = settings["mode"], force_alloc_complex = True)
+    prob.set_solver_print(level = -1)
+    return prob
+
+def _newton_iterations(prob):
+    # cumulative over every solve, counted by the warm starting Newton solvers, None for models without one
+    counts = [s.nonlinear_solver.warm_start_stats["iterations"] for s in prob.model.system_iter(include_self = True, recurse = True)
+              if hasattr(s.nonlinear_solver, "warm_start_stats")]
+    return sum(counts) if counts else None
+
+def _best(f, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def bench_script(script, generation, repeat = 5):
+    # times one script's model, the best of repeat for run_model and compute_totals, then measures peak Python
+    # memory over a full optimization in a second pass since tracemalloc slows everything it traces
+    module = importlib.import_module(script)
+    settings = SETTINGS[generation]
+    result = {"script": script, "generation": generation}
+    try:
+        names = _problem_names(module.Truss_Analysis)
+        result["n_design_vars"] = len(names[0])
+        if not names[0]:
+            raise RuntimeError("no indeps.A* design variables")
+
+        start = time.perf_counter()
+        prob = _build(module.Truss_Analysis, settings, names, driver = False)
+        prob.final_setup()
+        result["setup_s"] = time.perf_counter() - start
+
+        prob.run_model()
+        result["newton_iterations_run_model"] = _newton_iterations(prob)
+        result["run_model_s"] = _best(prob.run_model, repeat)
+        result["compute_totals_s"] = _best(prob.compute_totals, repeat)
+
+        prob = _build(module.Truss_Analysis, settings, names, driver = True)
+        start = time.perf_counter()
+        driver_result = prob.run_driver()
+        result["run_driver_s"] = time.perf_counter() - start
+        result["success"] = bool(driver_result.success)
+        result["objective"] = float(prob["obj_cmp.obj"][0])
+        result["optimizer_iterations"] = driver_result.iter_count
+        result["function_evaluations"] = driver_result.model_evals
+        result["gradient_evaluations"] = driver_result.deriv_evals
+        result["newton_iterations_run_driver"] = _newton_iterations(prob)
+
+        tracemalloc.start()
+        prob = _build(module.Truss_Analysis, settings, names, driver = True)
+        prob.run_driver()
+        result["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    except Exception as err:
+        # seven_truss_V3 and diff_seven_truss have a singular Jacobian, recorded rather than stopping the suite
+        result["error"] = f"{type(err).__name__}: {err}"
+    finally:
+        tracemalloc.stop()
+    return result
+
+def run_benchmarks(scripts = None, repeat = 5):
+    selected = [(s, g) for s, g in SCRIPTS if scripts is None or s in scripts or g in scripts]
+    # unit warnings of the V1 scripts and the coloring summaries would bury the report
+    with warnings.catch_warnings(), contextlib.redirect_stdout(io.StringIO()):
+        warnings.simplefilter("ignore")
+        results = [bench_script(script, generation, repeat) for script, generation in selected]
+    return {"python": platform.python_version(), "numpy": np.__version__, "openmdao": openmdao.__version__,
+            "machine": platform.machine(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+
+def compare(results, baseline, tolerance = 1.25, min_time = 0.005):
+    # every timing or count more than tolerance times its baseline, and scripts that newly fail. Timings of these
+    # small models are noisy, so a timing also has to grow by more than min_time seconds.
+    old = {r["script"]: r for r in baseline["results"]}
+    regressions = []
+    for new in results["results"]:
+        ref = old.get(new["script"])
+        if ref is None:
+            continue
+        if "error" in new and "error" not in ref:
+            regressions.append((new["script"], "error", None, new["error"]))
+            continue
+        for key, value in new.items():
+            if key.endswith(("_s", "_mb")) or "evaluations" in key or "iterations" in key:
+                if not isinstance(value, (int, float)) or not isinstance(ref.get(key), (int, float)):
+                    continue
+                if value > tolerance * ref[key] and (not key.endswith("_s") or value - ref[key] > min_time):
+                    regressions.append((new["script"], key, ref[key], value))
+    return regressions
+
+def report(results):
+    columns = ["setup_s", "run_model_s", "compute_totals_s", "run_driver_s", "function_evaluations", "gradient_evaluations",
+               "newton_iterations_run_driver", "peak_memory_mb"]
+    widths = [len(c) + 2 for c in columns]
+    lines = [f"{'script':<18}{'gen':<6}" + "".join(f"{c:>{w}}" for c, w in zip(columns, widths))]
+    for r in results["results"]:
+        if "error" in r:
+            lines.append(f"{r['script']:<18}{r['generation']:<6}  {r['error'][:100]}")
+            continue
+        cells = []
+        for c, w in zip(columns, widths):
+            value = r.get(c)
+            cells.append(f"{'-':>{w}}" if value is None else f"{value:>{w}.4g}" if isinstance(value, float) else f"{value:>{w}}")
+        lines.append(f"{r['script']:<18}{r['generation']:<6}" + "".join(cells))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Benchmark the truss formulations and write the results as JSON")
+    parser.add_argument("scripts", nargs = "*", help = "Scripts or generations (V1, V2, V3, diff, V4) to run, all by default")
+    parser.add_argument("--repeat", type = int, default = 5, help = "Repeats of run_model and compute_totals, the best is kept")
+    parser.add_argument("--output", default = "truss_bench.json", help = "File the results are written to")
+    parser.add_argument("--baseline", default = None, help = "Results of an earlier run to check for regressions against")
+    parser.add_argument("--tolerance", type = float, default = 1.25, help = "Ratio to the baseline counted as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scripts or None, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent = 1)
+    print(report(results))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for script, key, old, new in regressions:
+            print(f"regression in {script} {key}: {old} -> {new}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,248 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_bipartite_matching
+from truss_V3 import Beam, Node
+from truss_V4 import TrussSystem, SparseTrussSystem, MemberStress, StressConstraint, StructuralMass
+from truss_cache import CachedNewtonSolver, CachedRunOnce
+from truss_warmstart import WarmStartNewtonSolver
+from openmdao.api import Problem, Group, IndepVarComp, NewtonSolver, DirectSolver, MuxComp
+
+
+class TrussGeometry(object):
+
+    # nodes is an (n_nodes, 2) array of x, y coordinates in m, members an (n_members, 2) array of node indices,
+    # supports an (n_reactions, 2) array of (node, direction) and loads an (n_loads, 3) array of (node, force, direction),
+    # or an (n_cases, n_loads, 3) array for several load cases acting on the same load nodes
+    def __init__(self, nodes, members, supports, loads, areas = None):
+        self.nodes = np.asarray(nodes, dtype = float).reshape(-1, 2)
+        self.members = np.asarray(members, dtype = int).reshape(-1, 2)
+        supports = np.asarray(supports, dtype = float).reshape(-1, 2)
+        loads = np.asarray(loads, dtype = float)
+        loads = loads.reshape(-1, 3) if loads.ndim < 3 else loads
+        self.reaction_nodes = supports[:, 0].astype(int)
+        self.reaction_directions = supports[:, 1]
+        self.load_nodes = loads[..., 0].reshape(-1, loads.shape[-2])[0].astype(int)
+        if np.any(loads[..., 0] != self.load_nodes):
+            raise ValueError("Every load case must list its loads on the same nodes, use a zero force for unloaded nodes.")
+        self.load_forces = loads[..., 1]
+        self.load_directions = loads[..., 2]
+        self.areas = np.ones(len(self.members)) if areas is None else np.asarray(areas, dtype = float)
+
+    @classmethod
+    def from_arrays(cls, nodes, members, reaction_nodes, reaction_directions, load_nodes, load_forces, load_directions, areas = None):
+        # the same geometry from one array per attribute, load_forces and load_directions (n_loads,) or (n_cases, n_loads).
+        # Arrays of the right dtype, such as the memory maps of truss_io.load_truss, are kept without a copy.
+        geometry = cls.__new__(cls)
+        geometry.nodes = np.asarray(nodes, dtype = float).reshape(-1, 2)
+        geometry.members = np.asarray(members, dtype = int).reshape(-1, 2)
+        geometry.reaction_nodes = np.asarray(reaction_nodes, dtype = int).ravel()
+        geometry.reaction_directions = np.asarray(reaction_directions, dtype = float).ravel()
+        geometry.load_nodes = np.asarray(load_nodes, dtype = int).ravel()
+        geometry.load_forces = np.asarray(load_forces, dtype = float)
+        geometry.load_directions = np.asarray(load_directions, dtype = float)
+        if geometry.load_forces.shape[-1:] != geometry.load_nodes.shape or geometry.load_directions.shape != geometry.load_forces.shape:
+            raise ValueError(f"{len(geometry.load_nodes)} load nodes need load forces and directions of shape (n_loads,) or (n_cases, n_loads), "
+                             f"got {geometry.load_forces.shape} and {geometry.load_directions.shape}.")
+        geometry.areas = np.ones(len(geometry.members)) if areas is None else np.asarray(areas, dtype = float)
+        return geometry
+
+    @property
+    def n_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def n_members(self):
+        return len(self.members)
+
+    @property
+    def n_reactions(self):
+        return len(self.reaction_nodes)
+
+    @property
+    def n_cases(self):
+        return 1 if self.load_forces.ndim == 1 else len(self.load_forces)
+
+    def vectors(self):
+        # vector from the 0th end to the 1st end of every member
+        return self.nodes[self.members[:, 1]] - self.nodes[self.members[:, 0]]
+
+    def directions(self):
+        d = self.vectors()
+        return np.arctan2(d[:, 1], d[:, 0])
+
+    def end_directions(self):
+        # direction of every member at its 0th and 1st end, pointing away from the node, so a tensile force is positive
+        direction = self.directions()
+        return np.stack([direction, direction + np.pi], axis = 1)
+
+    def lengths(self):
+        d = self.vectors()
+        return np.hypot(d[:, 0], d[:, 1])
+
+
+class Truss_Model(Group):
+
+    def initialize(self):
+        self.options.declare("geometry", default = None, desc = "TrussGeometry describing nodes, members, supports and loads")
+        self.options.declare("solver", default = "newton", values = ["newton", "sparse"], desc = "Newton iterations on TrussSystem, or one sparse factorization with SparseTrussSystem")
+        self.options.declare("tension", default = 400., desc = "Allowable tensile stress in MPa, scalar or one per member")
+        self.options.declare("compression", default = 400., desc = "Allowable compressive stress magnitude in MPa, scalar or one per member")
+        self.options.declare("ks", default = False, types = bool, desc = "Add the KS aggregate of the stress margins as con.con_ks")
+        self.options.declare("density", default = None, desc = "Density of each member in kg/m**3, the objective is volume when None")
+        self.options.declare("cache_size", default = 128, types = int, desc = "Number of converged truss solutions kept by the cycle solver, 0 disables the cache")
+        self.options.declare("backend", default = None, desc = "Kernel backend of the truss and stress components, numpy or numba, None for the default")
+
+    def setup(self):
+        geometry = self.options["geometry"]
+        n_members = geometry.n_members
+        backend = self.options["backend"]
+
+        # every geometric quantity is one array-valued output, so setup cost grows linearly with the truss size
+        indeps = self.add_subsystem("indeps", IndepVarComp())
+        indeps.add_output("direction", geometry.directions(), units = "rad", desc = "Direction of each beam")
+        indeps.add_output("L", geometry.lengths(), units = "m", desc = "Length of each beam")
+        indeps.add_output("reaction_direction", geometry.reaction_directions, units = "rad", desc = "Direction of each reaction force")
+        indeps.add_output("ext", geometry.load_forces, units = "N", desc = "Forces applied to beam structure in each load case")
+        indeps.add_output("ext_direction", geometry.load_directions, units = "rad", desc = "Direction of forces applied to beam structure in each load case")
+        indeps.add_output("A", geometry.areas, units = "m**2", desc = "Cross sectional area of each beam")
+
+        truss_class = SparseTrussSystem if self.options["solver"] == "sparse" else TrussSystem
+        cycle = self.add_subsystem("cycle", Group())
+        cycle.add_subsystem("truss", truss_class(n_nodes = geometry.n_nodes, members = geometry.members, reaction_nodes = geometry.reaction_nodes,
+                                                load_nodes = geometry.load_nodes, n_cases = geometry.n_cases, backend = backend))
+
+        self.connect("indeps.direction", "cycle.truss.direction")
+        self.connect("indeps.reaction_direction", "cycle.truss.reaction_direction")
+        self.connect("indeps.ext", "cycle.truss.ext")
+        self.connect("indeps.ext_direction", "cycle.truss.ext_direction")
+        self.connect("indeps.A", ["stress.A", "obj_cmp.A"])
+
+        # member forces do not depend on area, so the cycle solvers are keyed on directions and external forces only
+        # and evaluations that only change areas reuse the cached solution. The sparse system solves itself and does
+        # its own linear solves, so it only needs the cache.
+        if self.options["solver"] == "newton":
+            cycle.nonlinear_solver = CachedNewtonSolver(cache_size = self.options["cache_size"])
+            cycle.nonlinear_solver.options['atol'] = 1e-7
+            cycle.nonlinear_solver.options['solve_subsystems'] = True
+            cycle.nonlinear_solver.options["iprint"] = 2
+            cycle.linear_solver = DirectSolver(assemble_jac = True)
+        else:
+            cycle.nonlinear_solver = CachedRunOnce(cache_size = self.options["cache_size"])
+
+        self.add_subsystem("stress", MemberStress(n_members = n_members, n_reactions = geometry.n_reactions, n_cases = geometry.n_cases,
+                                                        backend = backend))
+        self.connect("cycle.truss.force", "stress.force")
+
+        self.add_subsystem("obj_cmp", StructuralMass(n_members = n_members, density = self.options["density"]))
+        self.add_subsystem("con", StressConstraint(n_members = n_members, n_cases = geometry.n_cases, tension = self.options["tension"],
+                                                   compression = self.options["compression"], ks = self.options["ks"]))
+
+        self.connect("indeps.L", "obj_cmp.L")
+        self.connect("stress.sigma", "con.sigma")
+
+
+def balance_ends(geometry):
+    # the end of every member whose node holds it in a force balance residual of a truss_V3 Node. A Node with r
+    # reactions balances forces in the loads of its first 2 - r beams and passes the rest through from their Beam,
+    # so every beam needs exactly one balancing end: with none its force is undetermined, with two its residual is
+    # always zero. The ends are a perfect matching of members to the 2 - r balance slots of every node.
+    n_reactions = np.bincount(geometry.reaction_nodes, minlength = geometry.n_nodes)
+    if np.any(n_reactions > 2):
+        raise ValueError("A truss_V3 Node takes at most two reactions.")
+    slots = np.maximum(2 - n_reactions, 0)
+    first_slot = np.concatenate([[0], np.cumsum(slots)])
+    if first_slot[-1] != geometry.n_members:
+        raise ValueError(f"The {geometry.n_nodes} nodes have {first_slot[-1]} balance slots for {geometry.n_members} members, "
+                         "the truss is not statically determinate.")
+
+    # biadjacency matrix of members to the slots of both of their end nodes
+    rows, cols = [], []
+    for e in range(2):
+        nodes = geometry.members[:, e]
+        for k in range(2):
+            has_slot = slots[nodes] > k
+            rows.append(np.nonzero(has_slot)[0])
+            cols.append(first_slot[nodes[has_slot]] + k)
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    graph = csr_matrix((np.ones(len(rows)), (rows, cols)), shape = (geometry.n_members, first_slot[-1]))
+    slot = maximum_bipartite_matching(graph, perm_type = "column")
+    if np.any(slot < 0):
+        raise ValueError("No assignment of members to node force balances exists, the truss has a mechanism.")
+    slot_node = np.repeat(np.arange(geometry.n_nodes), slots)
+    return (slot_node[slot] == geometry.members[:, 1]).astype(int)
+
+
+class Truss_V3_Model(Group):
+
+    # the same analysis as the V3 scripts, one truss_V3 Node per node and one Beam per member, built from a TrussGeometry
+    # so generated trusses of any size can be solved with the V3 formulation. Outputs match the scripts, forces in
+    # cycle.beam*.beam_force and reactions in cycle.node*.reaction*, with the stress constraint in con.con.
+
+    def initialize(self):
+        self.options.declare("geometry", default = None, desc = "TrussGeometry describing nodes, members, supports and loads")
+        self.options.declare("tension", default = 400., desc = "Allowable tensile stress in MPa, scalar or one per member")
+        self.options.declare("compression", default = 400., desc = "Allowable compressive stress magnitude in MPa, scalar or one per member")
+        self.options.declare("density", default = None, desc = "Density of each member in kg/m**3, the objective is volume when None")
+        self.options.declare("warm_start", default = False, types = bool, desc = "Start every Newton solve of the cycle from the last converged one with a linear predictor")
+
+    def setup(self):
+        geometry = self.options["geometry"]
+        if geometry.n_cases != 1:
+            raise ValueError("The V3 formulation takes a single load case.")
+        n_members = geometry.n_members
+        balance_end = balance_ends(geometry)
+
+        indeps = self.add_subsystem("indeps", IndepVarComp())
+        indeps.add_output("end_direction", geometry.end_directions(), units = "rad", desc = "Direction of each beam at its 0th and 1st end")
+        indeps.add_output("L", geometry.lengths(), units = "m", desc = "Length of each beam")
+        indeps.add_output("reaction_direction", geometry.reaction_directions, units = "rad", desc = "Direction of each reaction force")
+        indeps.add_output("ext", geometry.load_forces, units = "N", desc = "Forces applied to beam structure")
+        indeps.add_output("ext_direction", geometry.load_directions, units = "rad", desc = "Direction of forces applied to beam structure")
+        indeps.add_output("A", geometry.areas, units = "m**2", desc = "Cross sectional area of each beam")
+
+        # beams at every node, the balancing ones first, as (member, end)
+        ends = [[] for _ in range(geometry.n_nodes)]
+        for passing in (False, True):
+            for k in range(n_members):
+                for e in range(2):
+                    if (balance_end[k] != e) == passing:
+                        ends[geometry.members[k, e]].append((k, e))
+        reactions = [np.nonzero(geometry.reaction_nodes == i)[0] for i in range(geometry.n_nodes)]
+        loads = [np.nonzero(geometry.load_nodes == i)[0] for i in range(geometry.n_nodes)]
+
+        cycle = self.add_subsystem("cycle", Group())
+        for i in range(geometry.n_nodes):
+            node = f"cycle.node{i}"
+            cycle.add_subsystem(f"node{i}", Node(n_loads = len(ends[i]), n_reactions = len(reactions[i]), n_external_forces = len(loads[i])))
+            for j, (k, e) in enumerate(ends[i]):
+                self.connect("indeps.end_direction", f"{node}.direction{j}_load", src_indices = [2 * k + e], flat_src_indices = True)
+                self.connect(f"{node}.load_out{j}", f"cycle.beam{k}.force{e}")
+                self.connect(f"cycle.beam{k}.beam_force", f"{node}.load_in{j}")
+            for j, r in enumerate(reactions[i]):
+                self.connect("indeps.reaction_direction", f"{node}.direction{j}_reaction", src_indices = [r])
+            for j, l in enumerate(loads[i]):
+                self.connect("indeps.ext", f"{node}.force{j}_ext", src_indices = [l])
+                self.connect("indeps.ext_direction", f"{node}.direction{j}_ext", src_indices = [l])
+        for k in range(n_members):
+            cycle.add_subsystem(f"beam{k}", Beam())
+            self.connect("indeps.A", f"cycle.beam{k}.A", src_indices = [k])
+
+        cycle.nonlinear_solver = WarmStartNewtonSolver() if self.options["warm_start"] else NewtonSolver()
+        cycle.nonlinear_solver.options['atol'] = 1e-7
+        cycle.nonlinear_solver.options['solve_subsystems'] = True
+        cycle.nonlinear_solver.options["iprint"] = 2
+        cycle.linear_solver = DirectSolver(assemble_jac = True)
+
+        # stresses of every beam are gathered into one vector for a single vectorized stress constraint
+        stress = self.add_subsystem("stress", MuxComp(vec_size = n_members))
+        stress.add_var("sigma", shape = (1,), axis = 0, units = "MPa")
+        for k in range(n_members):
+            self.connect(f"cycle.beam{k}.sigma", f"stress.sigma_{k}")
+
+        self.add_subsystem("obj_cmp", StructuralMass(n_members = n_members, density = self.options["density"]))
+        self.add_subsystem("con", StressConstraint(n_members = n_members, tension = self.options["tension"],
+                                                   compression = self.options["compression"]))
+
+        self.connect("indeps.A", "obj_cmp.A")
+        self.connect("indeps.L", "obj_cmp.L")
+        self.connect("stress.sigma", "con.sigma")
@@ -0,0 +1,98 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import openmdao
+from openmdao.api import NewtonSolver, NonlinearRunOnce
+from truss_warmstart import WarmStartMixin
+
+
+class SolutionCache(object):
+
+    # bounded least recently used map from a hash of the inputs of a group to its converged outputs
+    def __init__(self, maxsize = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last = False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+
+def _restore(system, outputs, residuals):
+    # puts a converged solution back into the group and passes its outputs on to the inputs connected inside the
+    # group, as the end of a solve would, so a following linearize runs at the solution. The transfer is the one
+    # OpenMDAO internal the cache needs beyond the vectors every solver works on, checked on its first use.
+    if not hasattr(system, "_transfer"):
+        raise RuntimeError(f"The solution cache needs System._transfer of OpenMDAO 3, which OpenMDAO {openmdao.__version__} does not have.")
+    system._outputs.set_val(outputs)
+    system._residuals.set_val(residuals)
+    system._transfer("nonlinear", "fwd")
+
+
+class CachedSolverMixin(object):
+
+    # the key is a hash of the group's whole input vector. Inputs fed from outside the group are directions,
+    # external forces and, when they are used inside the group, areas. Inputs the group feeds itself hold the state a
+    # solve starts from, so a group connected inside only hits when it also starts from the same state, and the cache
+    # pays off for groups that solve in one component, like the cycle of Truss_Model.
+
+    def _declare_options(self):
+        super()._declare_options()
+        self.options.declare("cache_size", default = 128, types = int, desc = "Number of converged solutions kept, 0 disables the cache")
+
+    def _setup_solvers(self, system, depth):
+        super()._setup_solvers(system, depth)
+        self.cache = SolutionCache(self.options["cache_size"])
+
+    def _cache_key(self, system):
+        return hashlib.sha1(np.ascontiguousarray(system._inputs.asarray()).tobytes()).hexdigest()
+
+    def solve(self):
+        system = self._system()
+        if self.options["cache_size"] == 0 or system.under_complex_step:
+            return super().solve()
+
+        key = self._cache_key(system)
+        hit = self.cache.get(key)
+        if hit is not None:
+            _restore(system, *hit)
+            # a warm start starts from the restored solution
+            if isinstance(self, WarmStartMixin):
+                self._restored(system)
+            return
+
+        super().solve()
+        self.cache.put(key, (system._outputs.asarray(copy = True), system._residuals.asarray(copy = True)))
+
+
+class CachedNewtonSolver(CachedSolverMixin, WarmStartMixin, NewtonSolver):
+
+    # Newton solver that skips the solve entirely when the group's inputs match a recently converged solution and
+    # otherwise starts from the last converged solution
+    pass
+
+
+class CachedRunOnce(CachedSolverMixin, NonlinearRunOnce):
+
+    # for groups whose components solve themselves, e.g. SparseTrussSystem, skipping the factorization on a hit
+    pass
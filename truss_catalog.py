@@ -0,0 +1,187 @@
+import os
+import queue
+import heapq
+import multiprocessing
+import numpy as np
+from openmdao.api import Problem
+from truss_fsd import FullyStressedDriver
+
+
+def section_catalog(smallest, largest, n_sections):
+    # n_sections areas in m**2 spaced evenly in log between smallest and largest, like the steps of a fabricator's
+    # table of standard sections
+    return np.geomspace(smallest, largest, n_sections)
+
+
+# each worker process keeps one sizing Problem with a FullyStressedDriver for the whole search, like the sweep
+# workers, and solves the continuous relaxation of a node with the areas restricted to the node's catalog ranges
+_worker = {}
+
+def _setup_worker(model_factory, catalog, design_vars, objective, constraints, allowable):
+    prob = Problem(model_factory(), reports = None)
+    prob.driver = FullyStressedDriver(allowable = allowable, disp = False)
+    for name in design_vars:
+        prob.model.add_design_var(name, lower = catalog[0], upper = catalog[-1])
+    prob.model.add_objective(objective)
+    for name, lower in constraints.items():
+        prob.model.add_constraint(name, lower = lower)
+    prob.setup()
+    prob.set_solver_print(level = -1)
+    prob.final_setup()
+    _worker["prob"] = prob
+    _worker["catalog"] = catalog
+    _worker["objective"] = objective
+    _worker["lower"] = np.concatenate([np.broadcast_to(np.asarray(lower, dtype = float), (np.size(prob[name]),))
+                                       for name, lower in constraints.items()])
+    _worker["tol"] = 1e-6 * np.max(allowable if not isinstance(allowable, dict) else [np.max(value) for value in allowable.values()])
+    _worker["sizes"] = [np.size(prob[name]) for name in design_vars]
+
+def _feasible():
+    driver = _worker["prob"].driver
+    margins = driver.get_margins()
+    violated = margins < _worker["lower"] - _worker["tol"]
+    return not violated.any(), violated
+
+def _round_and_repair(x, hi):
+    # rounds every area up to the catalog, then bumps the members of violated margins up one section at a time,
+    # which only takes the first analysis for a determinate truss where a larger area never raises another stress
+    prob = _worker["prob"]
+    driver = prob.driver
+    catalog = _worker["catalog"]
+    index = np.minimum(np.searchsorted(catalog, x * (1 - 1e-9)), hi)
+    evaluations = 0
+    for repair in range(20):
+        driver.set_design(catalog[index])
+        prob.run_model()
+        evaluations += 1
+        feasible, violated = _feasible()
+        if feasible:
+            return float(prob[_worker["objective"]][0]), index, evaluations
+        members = driver.margin_members()[violated]
+        members = np.unique(members[members >= 0])
+        if len(members) == 0 or np.any(index[members] >= hi[members]):
+            break
+        index[members] += 1
+    return None, None, evaluations
+
+def _solve_node(node):
+    # continuous relaxation of the node with the fully stressed design, a lower bound on every catalog design in
+    # the node, and a catalog design found from it by rounding with repair
+    prob = _worker["prob"]
+    driver = prob.driver
+    catalog = _worker["catalog"]
+    lo, hi, start = node
+    driver.set_bounds(catalog[lo], catalog[hi])
+    driver.set_design(np.clip(start, catalog[lo], catalog[hi]))
+    driver.run()
+    evaluations = driver.iter_count
+
+    x = driver.get_design()
+    result = {"lo": lo, "hi": hi, "x": x, "bound": float(prob[_worker["objective"]][0]), "evaluations": evaluations, "objective": None}
+    result["feasible"], _ = _feasible()
+    if result["feasible"]:
+        result["objective"], result["index"], repairs = _round_and_repair(x, hi)
+        result["evaluations"] += repairs
+    return result
+
+
+def catalog_sizing(model_factory, catalog, design_vars = ("indeps.A",), constraints = None, objective = "obj_cmp.obj",
+                   allowable = 400., n_workers = None, gap = 1e-6, max_nodes = 100000):
+    # minimum mass, or volume, design with every area taken from catalog, by branch and bound over the catalog index ranges of
+    # the members. Each node is bounded by the continuous relaxation of its ranges, solved by a fully stressed
+    # design, and a catalog design is made from every relaxation by rounding up with repair. Nodes are handed to
+    # n_workers worker processes best bound first, two per worker in flight so no worker waits for the others or for
+    # the branching, and nodes whose bound is within a relative gap of the best catalog design are pruned. Branching splits the range of the member whose rounding up adds the most area at the
+    # catalog entries around its relaxed area, so a catalog of hundreds of sections costs no more nodes than one of
+    # ten. The relaxation is the exact continuous optimum for a statically determinate truss, as every Truss_Model
+    # is, and a fully stressed design otherwise, which makes the pruning a heuristic for other models.
+    # model_factory must be picklable, as for run_sweep, and the constraints are stress margins with their lower
+    # bounds as for FullyStressedDriver, con.con >= 0 when None. Returns the areas of every design variable, the objective of the best catalog design, the best bound, the
+    # catalog index of every area, the number of nodes and the number of analyses.
+    catalog = np.unique(np.asarray(catalog, dtype = float))
+    constraints = {"con.con": 0} if constraints is None else dict(constraints)
+    n_workers = os.cpu_count() if n_workers is None else n_workers
+    initargs = (model_factory, catalog, list(design_vars), objective, constraints, allowable)
+
+    # the parent keeps a Problem of its own for the sizes and starting areas of the design variables, and solves the
+    # nodes itself when there is a single worker
+    _setup_worker(*initargs)
+    sizes = _worker["sizes"]
+    n = sum(sizes)
+    root = (np.zeros(n, dtype = int), np.full(n, len(catalog) - 1), _worker["prob"].driver.get_design())
+
+    done = queue.Queue()
+    if n_workers == 1:
+        pool = None
+        submit = lambda node: done.put(_solve_node(node))
+    else:
+        pool = multiprocessing.Pool(n_workers, initializer = _setup_worker, initargs = initargs)
+        submit = lambda node: pool.apply_async(_solve_node, (node,), callback = done.put, error_callback = done.put)
+
+    try:
+        best, best_index = np.inf, None
+        # nodes waiting to be solved, ordered by the bound of their parent
+        heap = [(-np.inf, 0, root)]
+        n_nodes = evaluations = count = in_flight = 0
+        cutoff = np.inf
+        while True:
+            while heap and in_flight < 2 * n_workers and n_nodes < max_nodes and heap[0][0] < cutoff:
+                submit(heapq.heappop(heap)[2])
+                in_flight += 1
+                n_nodes += 1
+            if in_flight == 0:
+                break
+            result = done.get()
+            in_flight -= 1
+            if isinstance(result, BaseException):
+                raise result
+
+            evaluations += result["evaluations"]
+            if result["objective"] is not None and result["objective"] < best:
+                best, best_index = result["objective"], result["index"]
+                cutoff = best - gap * abs(best)
+            if not result["feasible"] or result["bound"] >= cutoff:
+                continue
+            # branch on the member whose rounding up adds the most area, the down child keeps the sections
+            # up to its relaxed area and the up child the larger ones
+            x, lo, hi = result["x"], result["lo"], result["hi"]
+            up = np.minimum(np.searchsorted(catalog, x * (1 - 1e-9)), hi)
+            added = np.where(catalog[up] > x * (1 + 1e-9), catalog[up] - x, 0.)
+            if not added.any():
+                continue
+            member = np.argmax(added)
+            down_hi, up_lo = hi.copy(), lo.copy()
+            down_hi[member], up_lo[member] = up[member] - 1, up[member]
+            for child in ((lo, down_hi, x), (up_lo, hi, x)):
+                count += 1
+                heapq.heappush(heap, (result["bound"], count, child))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    if best_index is None:
+        raise ValueError("No design from the catalog satisfies the constraints.")
+    # the best bound left is the smallest parent bound of the nodes not solved
+    bound = min(heap[0][0], best) if heap else best
+    areas = dict(zip(design_vars, np.split(catalog[best_index], np.cumsum(sizes)[:-1])))
+    return {"areas": areas, "index": best_index, "objective": best, "bound": bound, "n_nodes": n_nodes, "evaluations": evaluations}
+
+
+if __name__ == "__main__":
+
+    import time
+    import functools
+    from truss_builder import Truss_Model
+    from truss_generators import pratt
+
+    # a 101 member pratt truss sized from catalogs of 30 and 300 sections between 1 cm**2 and 10 m**2, in the parent
+    # process and with a worker per core. A node takes a few ms, so the workers only pay off with a core each.
+    model_factory = functools.partial(Truss_Model, geometry = pratt(25))
+    for n_sections in (30, 300):
+        catalog = section_catalog(1e-4, 10., n_sections)
+        for n_workers in sorted({1, os.cpu_count()}):
+            start = time.perf_counter()
+            design = catalog_sizing(model_factory, catalog, n_workers = n_workers)
+            print(f"{n_sections} sections, {n_workers} workers: volume {design['objective']:.6g} m**3, bound {design['bound']:.6g}, "
+                  f"{design['n_nodes']} nodes, {design['evaluations']} analyses, {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,171 @@
+import os
+import time
+import numpy as np
+from openmdao.recorders.case_recorder import CaseRecorder
+from openmdao.utils.coloring import Coloring
+
+# A checkpoint is a directory holding checkpoint.npz, with the design variables, the whole output vector of the
+# model and the evaluation count of the latest checkpointed driver evaluation, and coloring.pkl, the total coloring
+# of the run when it declared one. SciPy does not expose the quasi-Newton Hessian or the multipliers of SLSQP, so a
+# restarted SLSQP run rebuilds them from the restored design, and the analyses start from the restored forces.
+
+
+class CheckpointRecorder(CaseRecorder):
+
+    # driver recorder that writes a checkpoint every `every` driver evaluations, and also once `seconds` have passed
+    # since the last one when seconds is given, plus a final checkpoint when the run ends. Each checkpoint replaces
+    # the previous one in a single rename, so a run killed while writing leaves the last complete checkpoint.
+    #
+    #     prob.driver.add_recorder(CheckpointRecorder("sizing_checkpoint", every = 10))
+    #     prob.setup()
+    #     if os.path.exists("sizing_checkpoint/checkpoint.npz"):
+    #         restart(prob, "sizing_checkpoint")
+    #     prob.run_driver()
+
+    def __init__(self, path, every = 10, seconds = None):
+        super().__init__(record_viewer_data = False)
+        self.path = path
+        self.every = every
+        self.seconds = seconds
+        self.start_evaluation = 0
+        self.n_checkpoints = 0
+
+    def startup(self, recording_requester, comm = None):
+        super().startup(recording_requester, comm)
+        os.makedirs(self.path, exist_ok = True)
+        self._driver = recording_requester
+        self._last = time.perf_counter()
+        self._coloring_saved = False
+
+    def record_iteration_driver(self, recording_requester, data, metadata):
+        due = self.every is not None and self._counter % self.every == 0
+        if self.seconds is not None and time.perf_counter() - self._last >= self.seconds:
+            due = True
+        if due:
+            self.checkpoint()
+
+    def checkpoint(self, finished = False):
+        driver = self._driver
+        model = driver._problem().model
+        arrays = {f"desvar:{name}": value for name, value in driver.get_design_var_values(driver_scaling = False).items()}
+        arrays["outputs"] = model._outputs.asarray(copy = True)
+        arrays["evaluation"] = self.start_evaluation + self._counter
+        arrays["finished"] = finished
+
+        # np.savez adds .npz to names without it, so the temporary file keeps the suffix
+        filename = os.path.join(self.path, "checkpoint.npz")
+        np.savez(os.path.join(self.path, "checkpoint.tmp.npz"), **arrays)
+        os.replace(os.path.join(self.path, "checkpoint.tmp.npz"), filename)
+
+        coloring = driver._coloring_info.coloring
+        if coloring is not None and not self._coloring_saved:
+            coloring.save(os.path.join(self.path, "coloring.pkl"))
+            self._coloring_saved = True
+
+        self._last = time.perf_counter()
+        self.n_checkpoints += 1
+
+    def record_iteration_system(self, recording_requester, data, metadata):
+        pass
+
+    def record_iteration_solver(self, recording_requester, data, metadata):
+        pass
+
+    def record_iteration_problem(self, recording_requester, data, metadata):
+        pass
+
+    def record_metadata_system(self, system, run_number = None):
+        pass
+
+    def record_metadata_solver(self, solver, run_number = None):
+        pass
+
+    def record_derivatives_driver(self, recording_requester, data, metadata):
+        pass
+
+    def record_viewer_data(self, model_viewer_data):
+        pass
+
+    def shutdown(self):
+        # called by prob.cleanup() or at exit, marks the run as finished
+        if getattr(self, "_driver", None) is not None and self._counter > 0:
+            self.checkpoint(finished = True)
+            self._driver = None
+
+
+def load_checkpoint(path):
+    # the arrays of the latest checkpoint in path, with the design variables gathered under "desvars"
+    with np.load(os.path.join(path, "checkpoint.npz")) as archive:
+        checkpoint = {"desvars": {}}
+        for key in archive.files:
+            if key.startswith("desvar:"):
+                checkpoint["desvars"][key[len("desvar:"):]] = archive[key]
+            else:
+                checkpoint[key] = archive[key]
+    checkpoint["evaluation"] = int(checkpoint["evaluation"])
+    checkpoint["finished"] = bool(checkpoint["finished"])
+    coloring = os.path.join(path, "coloring.pkl")
+    checkpoint["coloring"] = Coloring.load(coloring) if os.path.exists(coloring) else None
+    return checkpoint
+
+def restart(prob, path):
+    # resumes a run from the latest checkpoint in path: call after prob.setup() and before prob.run_driver(). The
+    # whole output vector is restored, design variables included, so the first analysis starts from the converged
+    # forces of the checkpoint, and a run that declared coloring reuses the saved coloring instead of computing it
+    # again. Checkpoint recorders of the driver carry on numbering evaluations from the checkpoint.
+    checkpoint = load_checkpoint(path)
+    driver = prob.driver
+    if checkpoint["coloring"] is not None and driver._coloring_info.dynamic:
+        driver.use_fixed_coloring(checkpoint["coloring"])
+    prob.final_setup()
+
+    outputs = prob.model._outputs
+    if outputs.asarray().size != checkpoint["outputs"].size:
+        raise ValueError(f"The checkpoint in {path} has {checkpoint['outputs'].size} outputs, the model has {outputs.asarray().size}, "
+                         f"it was written by a different model.")
+    outputs.set_val(checkpoint["outputs"])
+
+    for recorder in driver._rec_mgr._recorders:
+        if isinstance(recorder, CheckpointRecorder):
+            recorder.start_evaluation = checkpoint["evaluation"]
+    return checkpoint
+
+
+if __name__ == "__main__":
+
+    import shutil
+    import tempfile
+    from truss_generators import pratt
+    from truss_builder import Truss_Model
+    from openmdao.api import Problem, ScipyOptimizeDriver
+
+    def sizing_problem(path, maxiter):
+        prob = Problem(Truss_Model(geometry = pratt(25), solver = "sparse"), reports = None)
+        prob.driver = ScipyOptimizeDriver(optimizer = "SLSQP", maxiter = maxiter, disp = False)
+        prob.driver.declare_coloring(show_summary = False)
+        prob.driver.add_recorder(CheckpointRecorder(path, every = 5))
+        prob.model.add_design_var("indeps.A", lower = 0.001, upper = 100)
+        prob.model.add_objective("obj_cmp.obj")
+        prob.model.add_constraint("con.con", lower = 0)
+        prob.setup(mode = "rev")
+        prob.set_solver_print(level = -1)
+        return prob
+
+    # a sizing run cut short after 4 SLSQP iterations, then resumed from its checkpoint by a fresh problem
+    path = tempfile.mkdtemp()
+    prob = sizing_problem(path, maxiter = 4)
+    prob.run_driver()
+    prob.cleanup()
+    print(f"stopped at volume {prob['obj_cmp.obj'][0]:.6g} after {prob.driver.iter_count} evaluations")
+
+    prob = sizing_problem(path, maxiter = 200)
+    checkpoint = restart(prob, path)
+    result = prob.run_driver()
+    print(f"resumed from evaluation {checkpoint['evaluation']}, volume {prob['obj_cmp.obj'][0]:.6g} after {result.model_evals} more evaluations")
+
+    shutil.rmtree(path)
+    path = tempfile.mkdtemp()
+    prob = sizing_problem(path, maxiter = 200)
+    result = prob.run_driver()
+    print(f"uninterrupted run, volume {prob['obj_cmp.obj'][0]:.6g} after {result.model_evals} evaluations")
+    shutil.rmtree(path)
@@ -0,0 +1,218 @@
+import numpy as np
+from openmdao.core.driver import Driver, RecordingDebugging
+
+
+class FullyStressedDriver(Driver):
+
+    # fully stressed design: every member is resized so its most critical stress margin just reaches its lower
+    # bound, A_new = A |sigma| / (allowable - lower), which for a statically determinate truss is the closed form
+    # |P| / allowable, so one resize and one analysis to verify it find the minimum mass. In an indeterminate
+    # truss the member forces change with the areas and the resize is repeated until the areas settle. It replaces
+    # ScipyOptimizeDriver in the usual sizing setup:
+    #
+    #     prob.driver = FullyStressedDriver()
+    #     prob.model.add_design_var("indeps.A", lower = 0.001, upper = 100)
+    #     prob.model.add_objective("obj_cmp.obj")
+    #     prob.model.add_constraint("con.con", lower = 0)
+    #
+    # Every constraint has to be a stress margin allowable - |sigma| with a lower bound, as con.con of Truss_Model
+    # and the con* ExecComps of the scripts are. The allowable of each constraint comes from the allowable option,
+    # and the member of each margin is found from the total jacobian of the starting design, as the design variable
+    # its margin is most sensitive to. A design variable no margin is paired with carries no force and goes to its
+    # lower bound. The objective is only evaluated, the minimum mass follows from the fully stressed areas.
+    # set_bounds replaces the declared bounds for the following runs with flat lower and upper arrays over every
+    # design variable entry, which is how the catalog search restricts members to part of a catalog, and
+    # get_design, set_design, get_margins and margin_members give the flat design, margins and pairing of a run.
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.supports["optimization"] = True
+        self.supports["inequality_constraints"] = True
+        self.supports["gradients"] = True
+        self.supports["integer_design_vars"] = False
+        self.supports["distributed_design_vars"] = False
+        self.fail = False
+        self._bounds_override = None
+        self._member = None
+
+    def _setup_driver(self, problem):
+        super()._setup_driver(problem)
+        self._member = None
+
+    def _declare_options(self):
+        self.options.declare("maxiter", default = 50, types = int, desc = "Maximum number of resizes")
+        self.options.declare("tol", default = 1e-6, desc = "Largest relative change of any area at convergence")
+        self.options.declare("allowable", default = 400., desc = "Allowable stress of the margins, a scalar, or a dict of a scalar or "
+                                                                 "one value per entry for each constraint name")
+        self.options.declare("disp", default = True, types = bool, desc = "Print the result of the resizing")
+
+    def _get_name(self):
+        return "FullyStressedDriver"
+
+    def _allowables(self):
+        # allowable of every constraint entry, in the order of get_constraint_values
+        allowable = self.options["allowable"]
+        values = []
+        for name, meta in self._cons.items():
+            if meta["equals"] is not None or meta["lower"] is None or np.all(np.isneginf(meta["lower"])):
+                raise ValueError(f"{self.msginfo}: constraint '{name}' is not a stress margin with a lower bound.")
+            value = allowable[name] if isinstance(allowable, dict) else allowable
+            values.append(np.broadcast_to(np.asarray(value, dtype = float), (meta["size"],)))
+        return np.concatenate(values)
+
+    def _bounds(self, metas, key, fill):
+        values = []
+        for meta in metas.values():
+            value = fill if meta[key] is None else meta[key]
+            values.append(np.broadcast_to(np.asarray(value, dtype = float), (meta["size"],)))
+        return np.concatenate(values)
+
+    def set_bounds(self, lower = None, upper = None):
+        # flat lower and upper bounds over every design variable entry for the following runs, None for the declared ones
+        self._bounds_override = None if lower is None and upper is None else (np.asarray(lower, dtype = float), np.asarray(upper, dtype = float))
+
+    def get_design(self):
+        # unscaled values of every design variable entry as one flat array
+        return np.concatenate([np.ravel(value) for value in self.get_design_var_values(driver_scaling = False).values()])
+
+    def set_design(self, x):
+        i = 0
+        for name, meta in self._designvars.items():
+            self._set_design_var(name, x[i:i + meta["size"]])
+            i += meta["size"]
+
+    def get_margins(self):
+        # unscaled values of every constraint entry as one flat array
+        return np.concatenate([np.ravel(value) for value in self.get_constraint_values(driver_scaling = False).values()])
+
+    def margin_members(self):
+        # index into get_design of the member paired with every margin by the first run, -1 for margins of no member
+        if self._member is None:
+            raise RuntimeError(f"{self.msginfo}: margins are paired with members on the first run of the driver.")
+        return np.where(self._paired, self._member, -1)
+
+    def _analysis(self):
+        with RecordingDebugging(self._get_name(), self.iter_count, self):
+            self._run_solve_nonlinear()
+            self._metadata = {"success": True, "msg": ""}
+        self.iter_count += 1
+
+    def run(self):
+        self.result.reset()
+        self.iter_count = 0
+        self._total_jac = None
+        self._check_for_missing_objective()
+        self._check_for_invalid_desvar_values()
+
+        allowable = self._allowables()
+        margin = self._bounds(self._cons, "lower", -np.inf)
+        if self._bounds_override is None:
+            lower = self._bounds(self._designvars, "lower", -np.inf)
+            upper = self._bounds(self._designvars, "upper", np.inf)
+        else:
+            lower, upper = self._bounds_override
+        target = allowable - margin
+        if np.any(target <= 0):
+            raise ValueError(f"{self.msginfo}: every allowable stress must exceed the lower bound of its margin.")
+
+        self._analysis()
+
+        # the member of every margin is the design variable it depends on most, the only one in a determinate truss,
+        # found on the first run and kept for later runs of the same setup
+        if self._member is None:
+            jac = np.abs(self._compute_totals(of = list(self._cons), wrt = list(self._designvars), return_format = "array", driver_scaling = False))
+            self._member = jac.argmax(axis = 1)
+            self._paired = jac.max(axis = 1) > 0
+        member, paired = self._member, self._paired
+
+        self.fail = True
+        for resize in range(1, self.options["maxiter"] + 1):
+            x = self.get_design()
+            stress = np.maximum(allowable - self.get_margins(), 0.)
+            # the largest stress ratio over the margins of each member, the load cases of a member included, and
+            # zero for members without a margin so they go to the lower bound
+            ratio = np.zeros(len(x))
+            np.maximum.at(ratio, member[paired], stress[paired] / target[paired])
+            x_new = np.clip(x * ratio, lower, upper)
+
+            change = np.abs(x_new - x) / np.maximum(np.abs(x), 1e-300)
+            if change.max() <= self.options["tol"]:
+                self.fail = False
+                break
+            self.set_design(x_new)
+            self._analysis()
+
+        if self.options["disp"]:
+            state = "converged" if not self.fail else f"stopped after {self.options['maxiter']} resizes"
+            print(f"Fully stressed design {state}, {self.iter_count} analyses")
+            print("-" * 35)
+        return self.fail
+
+
+if __name__ == "__main__":
+
+    import time
+    from openmdao.api import Problem, ScipyOptimizeDriver, ExplicitComponent, Group, IndepVarComp, ExecComp
+    from truss_builder import Truss_Model
+    from truss_generators import pratt, F
+    from seven_truss_V4 import Truss_Analysis
+
+    def sizing(model, driver):
+        prob = Problem(model, reports = None)
+        prob.driver = driver
+        prob.model.add_design_var("indeps.A", lower = 0.001, upper = 100)
+        prob.model.add_objective("obj_cmp.obj")
+        prob.model.add_constraint("con.con", lower = 0)
+        prob.setup(mode = "rev")
+        prob.set_solver_print(level = -1)
+        start = time.perf_counter()
+        result = prob.run_driver()
+        return prob, result, time.perf_counter() - start
+
+    def scipy_driver():
+        driver = ScipyOptimizeDriver(optimizer = "SLSQP", tol = 1e-9, maxiter = 500, disp = False)
+        driver.declare_coloring(show_summary = False)
+        return driver
+
+    def compare(label, model):
+        slsqp, slsqp_result, slsqp_time = sizing(model(), scipy_driver())
+        fsd, fsd_result, fsd_time = sizing(model(), FullyStressedDriver(disp = False))
+        print(f"{label}: SLSQP volume {slsqp['obj_cmp.obj'][0]:.8g} in {slsqp_result.model_evals} analyses, {slsqp_time:.3f} s; "
+              f"FSD {fsd['obj_cmp.obj'][0]:.8g} in {fsd_result.model_evals} analyses, {fsd_time:.3f} s; "
+              f"largest area difference {np.abs(fsd['indeps.A'] - slsqp['indeps.A']).max():.2g} m**2")
+
+    # statically determinate trusses, where the fully stressed areas are |P| / allowable
+    compare("seven truss", Truss_Analysis)
+    compare("pratt truss, 101 members", lambda: Truss_Model(geometry = pratt(25)))
+
+    # the V4 analysis only takes statically determinate trusses, so the resizing of an indeterminate truss is shown
+    # on the classic three bar truss, three members from one loaded node to three supports, analysed by the
+    # displacement method since its forces depend on the areas
+    class ThreeBarStress(ExplicitComponent):
+
+        def setup(self):
+            self.supports = np.array([[-1., 1.], [0., 1.], [1., 1.]])
+            self.L = np.hypot(self.supports[:, 0], self.supports[:, 1])
+            self.n = self.supports / self.L[:, None]
+            self.add_input("A", val = np.ones(3), units = "m**2")
+            self.add_output("sigma", val = np.zeros(3), units = "MPa")
+            self.declare_partials("sigma", "A", method = "cs")
+
+        def compute(self, inputs, outputs):
+            E = 200e9
+            K = np.einsum("i,ij,ik->jk", E * inputs["A"] / self.L, self.n, self.n)
+            u = np.linalg.solve(K, np.array([F / 2, -F]))
+            # a member shortens as the node moves towards its support
+            outputs["sigma"] = -E * (self.n @ u) / self.L / 1e6
+
+    class ThreeBarTruss(Group):
+
+        def setup(self):
+            self.add_subsystem("indeps", IndepVarComp("A", val = np.ones(3), units = "m**2"))
+            self.add_subsystem("stress", ThreeBarStress())
+            self.add_subsystem("obj_cmp", ExecComp("obj = sum(A * L)", A = np.ones(3), L = np.hypot([-1., 0., 1.], 1.)))
+            self.add_subsystem("con", ExecComp("con = 400 - abs(sigma)", con = np.zeros(3), sigma = np.zeros(3)))
+            self.connect("indeps.A", ["stress.A", "obj_cmp.A"])
+            self.connect("stress.sigma", "con.sigma")
+
+    compare("indeterminate three bar truss", ThreeBarTruss)
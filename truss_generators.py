@@ -0,0 +1,134 @@
+import math
+import numpy as np
+from truss_builder import TrussGeometry
+
+# every generated truss is statically determinate, pinned at its first node and on a vertical roller at its last
+# support, with a downward load F on every loaded node. Member counts for n panels are 4n + 1 for pratt and howe,
+# 4n - 1 for warren and about 6n for k_truss, so 2500 panels give a 10,000 member truss.
+F = 4 * 10 ** 7
+
+
+def _supports(pin, roller):
+    return [[pin, 0], [pin, math.pi / 2], [roller, math.pi / 2]]
+
+def _loads(nodes, load):
+    return [[node, load, math.pi * 3 / 2] for node in nodes]
+
+def _chords(n_panels, panel, height):
+    # bottom nodes 0..n and top nodes n + 1..2n + 1, each top node above its bottom node, with both chords and every vertical
+    nodes = [[i * panel, 0] for i in range(n_panels + 1)] + [[i * panel, height] for i in range(n_panels + 1)]
+    top = n_panels + 1
+    members = [[i, i + 1] for i in range(n_panels)] + [[top + i, top + i + 1] for i in range(n_panels)]
+    members += [[i, top + i] for i in range(n_panels + 1)]
+    return nodes, members, top
+
+def pratt(n_panels, panel = 1., height = 1., load = F):
+    # diagonals slope down towards midspan, so under gravity loads they are in tension and the verticals in compression
+    nodes, members, top = _chords(n_panels, panel, height)
+    for i in range(n_panels):
+        members.append([top + i, i + 1] if 2 * i + 1 <= n_panels else [i, top + i + 1])
+    return TrussGeometry(nodes, members, _supports(0, n_panels), _loads(range(1, n_panels), load))
+
+def howe(n_panels, panel = 1., height = 1., load = F):
+    # diagonals slope up towards midspan, the mirror image of the pratt truss
+    nodes, members, top = _chords(n_panels, panel, height)
+    for i in range(n_panels):
+        members.append([i, top + i + 1] if 2 * i + 1 <= n_panels else [top + i, i + 1])
+    return TrussGeometry(nodes, members, _supports(0, n_panels), _loads(range(1, n_panels), load))
+
+def warren(n_panels, panel = 1., height = 1., load = F):
+    # equal diagonals alternating up and down, top nodes above the middle of every panel and no verticals
+    nodes = [[i * panel, 0] for i in range(n_panels + 1)] + [[(i + .5) * panel, height] for i in range(n_panels)]
+    top = n_panels + 1
+    members = [[i, i + 1] for i in range(n_panels)] + [[top + i, top + i + 1] for i in range(n_panels - 1)]
+    for i in range(n_panels):
+        members += [[i, top + i], [top + i, i + 1]]
+    return TrussGeometry(nodes, members, _supports(0, n_panels), _loads(range(1, n_panels), load))
+
+def k_truss(n_panels, panel = 1., height = 1., load = F):
+    # every vertical between the end and the middle panels is split at mid height, and the two diagonals of each
+    # panel run from that mid node to the top and bottom of the vertical on the side nearer the support. The middle
+    # panel, or the two either side of the middle vertical, have a single pratt diagonal instead.
+    nodes, members, top = _chords(n_panels, panel, height)
+    members = members[:2 * n_panels]
+    split = [i for i in range(1, n_panels) if 2 * i != n_panels]
+    mid = {i: len(nodes) + j for j, i in enumerate(split)}
+    nodes += [[i * panel, height / 2] for i in split]
+    for i in range(n_panels + 1):
+        if i in mid:
+            members += [[i, mid[i]], [mid[i], top + i]]
+        else:
+            members.append([i, top + i])
+    for i in range(n_panels):
+        # the vertical of this panel nearer midspan
+        inner = i + 1 if 2 * i + 1 < n_panels else i
+        outer = i if inner == i + 1 else i + 1
+        if inner in mid and abs(2 * outer - n_panels) > abs(2 * inner - n_panels):
+            members += [[mid[inner], outer], [mid[inner], top + outer]]
+        else:
+            members.append([top + i, i + 1] if 2 * i + 1 <= n_panels else [i, top + i + 1])
+    return TrussGeometry(nodes, members, _supports(0, n_panels), _loads(range(1, n_panels), load))
+
+def random_truss(n_nodes, size = 10., n_neighbors = 6, load = F, seed = None):
+    # minimally rigid planar framework grown by Henneberg steps: every new node at a random point is joined to two
+    # nodes picked among its nearest neighbours, which keeps the truss rigid with 2 n - 3 members. It is pinned at
+    # its leftmost node, on a roller at its rightmost node and loaded at every other node.
+    rng = np.random.default_rng(seed)
+    nodes = rng.uniform(0, size, (n_nodes, 2))
+    members = [[0, 1]]
+    for i in range(2, n_nodes):
+        near = np.argsort(np.hypot(*(nodes[:i] - nodes[i]).T))[:n_neighbors]
+        for _ in range(20):
+            a, b = rng.choice(near, 2, replace = False)
+            # retry a pair nearly collinear with the new node, which would hold it badly conditioned
+            u, v = nodes[a] - nodes[i], nodes[b] - nodes[i]
+            if abs(u[0] * v[1] - u[1] * v[0]) > .1 * np.hypot(*u) * np.hypot(*v):
+                break
+        members += [[a, i], [b, i]]
+    pin, roller = int(np.argmin(nodes[:, 0])), int(np.argmax(nodes[:, 0]))
+    loaded = [i for i in range(n_nodes) if i not in (pin, roller)]
+    return TrussGeometry(nodes, members, _supports(pin, roller), _loads(loaded, load))
+
+GENERATORS = {"pratt": pratt, "howe": howe, "warren": warren, "k_truss": k_truss, "random": random_truss}
+
+
+def generate(family, n_members, **kwargs):
+    # the member truss of a family closest to n_members members, panels for the regular families and nodes for random
+    if family == "random":
+        return random_truss(max(3, (n_members + 3) // 2), **kwargs)
+    per_panel = 6 if family == "k_truss" else 4
+    return GENERATORS[family](max(2, round(n_members / per_panel)), **kwargs)
+
+
+if __name__ == "__main__":
+
+    import time
+    import itertools
+    from truss_builder import Truss_Model, Truss_V3_Model
+    from openmdao.api import Problem
+
+    # every family from 10 to 10,000 members solved by the sparse V4 system, then up to 1000 members with the V3
+    # components, whose setup grows with the number of components
+    for family, n_members in itertools.product(GENERATORS, (10, 100, 1000, 10000)):
+        geometry = generate(family, n_members, seed = 0) if family == "random" else generate(family, n_members)
+        prob = Problem(Truss_Model(geometry = geometry, solver = "sparse"), reports = None)
+        start = time.perf_counter()
+        prob.setup()
+        prob.final_setup()
+        setup = time.perf_counter() - start
+        start = time.perf_counter()
+        prob.run_model()
+        print(f"{family:<8} {geometry.n_members:>6} members  setup {setup:.3f} s  run_model {time.perf_counter() - start:.3f} s  "
+              f"max |force| {np.max(np.abs(prob['cycle.truss.force'])):.4g} N")
+
+    for family, n_members in itertools.product(GENERATORS, (10, 100, 1000)):
+        geometry = generate(family, n_members, seed = 0) if family == "random" else generate(family, n_members)
+        prob = Problem(Truss_V3_Model(geometry = geometry), reports = None)
+        start = time.perf_counter()
+        prob.setup()
+        prob.final_setup()
+        setup = time.perf_counter() - start
+        prob.set_solver_print(level = -1)
+        start = time.perf_counter()
+        prob.run_model()
+        print(f"{family:<8} {geometry.n_members:>6} members  V3 setup {setup:.3f} s  run_model {time.perf_counter() - start:.3f} s")
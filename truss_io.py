@@ -0,0 +1,210 @@
+import os
+import itertools
+import json
+import numpy as np
+
+
+class ColumnWriter(object):
+
+    # appends rows to a columnar store, a directory holding one raw binary file per column and a columns.json
+    # header with the dtype, row shape and number of rows of every column, so rows can be streamed to disk as
+    # they are produced and the columns read back later as memory maps
+    def __init__(self, path):
+        self.path = path
+        self.n_rows = 0
+        self._columns = {}
+        self._files = {}
+        os.makedirs(path, exist_ok = True)
+
+    def append(self, rows):
+        # rows maps each column name to an array with one entry per row along the first axis
+        rows = {name: np.asarray(value) for name, value in rows.items()}
+        n_rows = {len(value) for value in rows.values()}
+        if len(n_rows) != 1:
+            raise ValueError(f"Every column must have the same number of rows, got {sorted(n_rows)}.")
+        n_rows = n_rows.pop()
+
+        if not self._columns:
+            for name, value in rows.items():
+                self._columns[name] = {"dtype": value.dtype.str, "shape": list(value.shape[1:])}
+                self._files[name] = open(os.path.join(self.path, f"{name}.bin"), "wb")
+        elif set(rows) != set(self._columns):
+            raise ValueError(f"Columns {sorted(rows)} do not match the columns of {self.path}, {sorted(self._columns)}.")
+
+        for name, value in rows.items():
+            column = self._columns[name]
+            if list(value.shape[1:]) != column["shape"]:
+                raise ValueError(f"Column '{name}' has rows of shape {column['shape']}, got {list(value.shape[1:])}.")
+            self._files[name].write(np.ascontiguousarray(value, dtype = column["dtype"]).tobytes())
+
+        self.n_rows += n_rows
+        self.flush()
+
+    def flush(self):
+        # the header is rewritten after every append, so a partially written store can still be read
+        for f in self._files.values():
+            f.flush()
+        with open(os.path.join(self.path, "columns.json"), "w") as f:
+            json.dump({"n_rows": self.n_rows, "columns": self._columns}, f, indent = 1)
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_columns(path, mmap = True):
+    # every column of a store written by ColumnWriter, as read only memory maps unless mmap is False
+    with open(os.path.join(path, "columns.json")) as f:
+        header = json.load(f)
+
+    columns = {}
+    for name, column in header["columns"].items():
+        shape = (header["n_rows"],) + tuple(column["shape"])
+        filename = os.path.join(path, f"{name}.bin")
+        if header["n_rows"] == 0:
+            columns[name] = np.zeros(shape, dtype = column["dtype"])
+        elif mmap:
+            columns[name] = np.memmap(filename, dtype = column["dtype"], mode = "r", shape = shape)
+        else:
+            columns[name] = np.fromfile(filename, dtype = column["dtype"], count = int(np.prod(shape))).reshape(shape)
+    return columns
+
+
+# a truss file is a directory with one ColumnWriter store per table, so every array of a truss of any size is read
+# back as a memory map and nothing is built per member. Members are rows of (ends, area), supports rows of
+# (node, direction) and loads rows of (node, force, direction) with one force and direction per load case.
+TRUSS_TABLES = {
+    "nodes": {"xy": ("<f8", [2])},
+    "members": {"ends": ("<i8", [2]), "area": ("<f8", [])},
+    "supports": {"node": ("<i8", []), "direction": ("<f8", [])},
+    "loads": {"node": ("<i8", []), "force": ("<f8", None), "direction": ("<f8", None)},
+}
+
+
+def _truss_tables(geometry):
+    # the tables of a TrussGeometry, with load cases along the second axis of the loads
+    return {"nodes": {"xy": geometry.nodes},
+            "members": {"ends": geometry.members, "area": geometry.areas},
+            "supports": {"node": geometry.reaction_nodes, "direction": geometry.reaction_directions},
+            "loads": {"node": geometry.load_nodes, "force": np.atleast_2d(geometry.load_forces).T,
+                      "direction": np.atleast_2d(geometry.load_directions).T}}
+
+def _geometry(tables):
+    from truss_builder import TrussGeometry
+    loads = tables["loads"]
+    # a single load case keeps flat load vectors like TrussGeometry does
+    force, direction = loads["force"].T, loads["direction"].T
+    if len(force) == 1:
+        force, direction = force[0], direction[0]
+    return TrussGeometry.from_arrays(tables["nodes"]["xy"], tables["members"]["ends"], tables["supports"]["node"], tables["supports"]["direction"],
+                                     loads["node"], force, direction, tables["members"]["area"])
+
+def save_truss(path, geometry):
+    # a directory of raw column files, or a single compressed archive when path ends in .npz
+    tables = _truss_tables(geometry)
+    if path.endswith(".npz"):
+        np.savez_compressed(path, **{f"{table}.{name}": value for table, columns in tables.items() for name, value in columns.items()})
+        return
+    for table, columns in tables.items():
+        with ColumnWriter(os.path.join(path, table)) as writer:
+            writer.append({name: np.asarray(value, dtype = TRUSS_TABLES[table][name][0]) for name, value in columns.items()})
+
+def load_truss(path, mmap = True):
+    # TrussGeometry of a truss file, whose arrays are read only memory maps of the column files unless mmap is
+    # False. An .npz archive is always read into memory.
+    if path.endswith(".npz"):
+        with np.load(path) as archive:
+            tables = {table: {} for table in TRUSS_TABLES}
+            for key in archive.files:
+                table, name = key.split(".")
+                tables[table][name] = archive[key]
+        return _geometry(tables)
+    return _geometry({table: read_columns(os.path.join(path, table), mmap = mmap) for table in TRUSS_TABLES})
+
+def import_csv(path, nodes, members, supports, loads = None, chunk_rows = 100000):
+    # builds a truss file from CSV tables with a header row, reading chunk_rows lines at a time so tables larger
+    # than memory can be converted. Rows are matched to columns by header name:
+    #     nodes     x, y                  one row per node, numbered in file order
+    #     members   node0, node1[, area]  area defaults to 1
+    #     supports  node, direction
+    #     loads     node, force, direction, or force0, direction0, force1, direction1, ... for several load cases
+    sources = {"nodes": nodes, "members": members, "supports": supports, "loads": loads}
+    for table, filename in sources.items():
+        with ColumnWriter(os.path.join(path, table)) as writer:
+            if filename is None:
+                writer.append({name: np.zeros((0,) + tuple(shape or [1]), dtype = dtype) for name, (dtype, shape) in TRUSS_TABLES[table].items()})
+                continue
+            with open(filename) as f:
+                header = [name.strip() for name in f.readline().split(",")]
+                while True:
+                    lines = list(itertools.islice(f, chunk_rows))
+                    if not lines:
+                        break
+                    writer.append(_csv_rows(table, header, np.loadtxt(lines, delimiter = ",", ndmin = 2), filename))
+            if writer.n_rows == 0:
+                raise ValueError(f"{filename} has no rows.")
+
+def _csv_rows(table, header, rows, filename):
+    def column(*names):
+        missing = [name for name in names if name not in header]
+        if missing:
+            raise ValueError(f"{filename} has no {', '.join(missing)} column, its header is {', '.join(header)}.")
+        return rows[:, [header.index(name) for name in names]]
+
+    if table == "nodes":
+        return {"xy": column("x", "y")}
+    if table == "members":
+        area = column("area")[:, 0] if "area" in header else np.ones(len(rows))
+        return {"ends": column("node0", "node1").astype(np.int64), "area": area}
+    if table == "supports":
+        return {"node": column("node")[:, 0].astype(np.int64), "direction": column("direction")[:, 0]}
+    cases = [name[len("force"):] for name in header if name.startswith("force")]
+    return {"node": column("node")[:, 0].astype(np.int64), "force": column(*(f"force{case}" for case in cases)),
+            "direction": column(*(f"direction{case}" for case in cases))}
+
+
+if __name__ == "__main__":
+
+    import time
+    import tempfile
+    from truss_generators import pratt
+    from truss_builder import Truss_Model
+    from openmdao.api import Problem
+
+    # a 250,001 member pratt truss written as CSV, imported in chunks, then loaded as memory maps and solved
+    geometry = pratt(62500)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = {table: os.path.join(tmp, f"{table}.csv") for table in ("nodes", "members", "supports", "loads")}
+        np.savetxt(csv["nodes"], geometry.nodes, delimiter = ",", header = "x,y", comments = "")
+        np.savetxt(csv["members"], geometry.members, delimiter = ",", header = "node0,node1", comments = "", fmt = "%d")
+        np.savetxt(csv["supports"], np.column_stack([geometry.reaction_nodes, geometry.reaction_directions]), delimiter = ",",
+                   header = "node,direction", comments = "")
+        np.savetxt(csv["loads"], np.column_stack([geometry.load_nodes, geometry.load_forces, geometry.load_directions]), delimiter = ",",
+                   header = "node,force,direction", comments = "")
+
+        start = time.perf_counter()
+        import_csv(os.path.join(tmp, "pratt"), csv["nodes"], csv["members"], csv["supports"], csv["loads"])
+        print(f"CSV import of {geometry.n_members} members {time.perf_counter() - start:.3f} s")
+
+        start = time.perf_counter()
+        save_truss(os.path.join(tmp, "pratt.npz"), geometry)
+        print(f"npz save {time.perf_counter() - start:.3f} s")
+
+        for path, mmap in (("pratt", True), ("pratt", False), ("pratt.npz", False)):
+            start = time.perf_counter()
+            loaded = load_truss(os.path.join(tmp, path), mmap = mmap)
+            print(f"load {path:<10} mmap {str(mmap):<6} {1e3 * (time.perf_counter() - start):8.3f} ms")
+
+        loaded = load_truss(os.path.join(tmp, "pratt"))
+        prob = Problem(Truss_Model(geometry = loaded, solver = "sparse"), reports = None)
+        prob.setup()
+        prob.run_model()
+        print(f"solved, max |force| {np.max(np.abs(prob['cycle.truss.force'])):.4g} N")
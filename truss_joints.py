@@ -0,0 +1,237 @@
+import math
+from collections import deque
+import numpy as np
+from truss_V2 import Node
+from truss_V4 import MemberStress, StressConstraint, StructuralMass
+from openmdao.api import ExplicitComponent, Group, IndepVarComp, MuxComp
+
+
+def _choose_axes(directions, tol):
+    # Node finds new_truss 1 by summing along the first axis, which the second unknown must have no component in,
+    # so of the x-first and y-first orderings of the two unknowns take the one that divides by the largest cos/sin.
+    # When neither unknown lies along x or y the joint is summed in a frame whose y axis is the second unknown.
+    a, b = directions
+    if abs(math.sin(a - b)) < tol:
+        return None
+    best = None
+    for order in ((0, 1), (1, 0)):
+        first, second = directions[order[0]], directions[order[1]]
+        for solve_first, f, g in (("x", math.cos, math.sin), ("y", math.sin, math.cos)):
+            if abs(f(second)) < tol:
+                score = abs(f(first) * g(second))
+                if best is None or score > best[0]:
+                    best = (score, order, solve_first, 0.)
+    if best is None:
+        return (0, 1), "x", b - math.pi / 2
+    return best[1:]
+
+def plan_joints(geometry, tol = 1e-12):
+    # orders the joints of a statically determinate truss so that each one has at most two unknown forces once the
+    # joints before it are solved. Forces are numbered like the force vector of Truss_Model, the members followed by
+    # the reactions. Each step is a dict with the node, the known forces and loads acting on it, the unknown forces it
+    # solves and the axes to sum along. When every joint left has more than two unknowns and no reaction is known yet,
+    # the three reactions are first found from the equilibrium of the whole truss.
+    n_members = geometry.n_members
+    n_forces = n_members + geometry.n_reactions
+    if geometry.n_cases != 1:
+        raise ValueError("The method of joints planner takes a single load case.")
+    if n_forces != 2 * geometry.n_nodes:
+        raise ValueError(f"A truss with {geometry.n_nodes} nodes needs {2 * geometry.n_nodes} member and reaction forces "
+                         f"to be statically determinate, got {n_forces}.")
+
+    end_directions = geometry.end_directions()
+    # every force acting on each node as (force, direction source, direction)
+    at_node = [[] for _ in range(geometry.n_nodes)]
+    for k, ends in enumerate(geometry.members):
+        for e in range(2):
+            at_node[ends[e]].append((k, ("end_direction", 2 * k + e), end_directions[k, e]))
+    for j, node in enumerate(geometry.reaction_nodes):
+        at_node[node].append((n_members + j, ("reaction_direction", j), geometry.reaction_directions[j]))
+    loads_at = [[] for _ in range(geometry.n_nodes)]
+    for l, node in enumerate(geometry.load_nodes):
+        loads_at[node].append(l)
+
+    known = np.zeros(n_forces, dtype = bool)
+    n_unknown = np.array([len(forces) for forces in at_node])
+    queue = deque(np.nonzero(n_unknown <= 2)[0])
+    steps = []
+    reactions_solved = False
+
+    def solved(force):
+        known[force] = True
+        nodes = geometry.members[force] if force < n_members else [geometry.reaction_nodes[force - n_members]]
+        for node in nodes:
+            n_unknown[node] -= 1
+            if n_unknown[node] <= 2:
+                queue.append(node)
+
+    while not known.all():
+        if not queue:
+            if reactions_solved or known[n_members:].any() or geometry.n_reactions != 3:
+                raise ValueError("Every unsolved joint has more than two unknown forces, the truss cannot be solved by the method of joints.")
+            steps.append({"node": None, "unknown": list(range(n_members, n_forces))})
+            reactions_solved = True
+            for force in range(n_members, n_forces):
+                solved(force)
+            continue
+
+        node = queue.popleft()
+        unknown = [force for force in at_node[node] if not known[force[0]]]
+        if not unknown or len(unknown) > 2:
+            continue
+        if len(unknown) == 1:
+            direction = unknown[0][2]
+            order, solve_first, frame = (0,), ("x" if abs(math.cos(direction)) >= abs(math.sin(direction)) else "y"), 0.
+        else:
+            axes = _choose_axes([force[2] for force in unknown], tol)
+            if axes is None:
+                # two collinear unknowns, wait for one of them to be solved at its other end
+                continue
+            order, solve_first, frame = axes
+
+        steps.append({"node": int(node), "known": [force for force in at_node[node] if known[force[0]]], "loads": loads_at[node],
+                      "unknown": [unknown[i] for i in order], "solve_first": solve_first, "frame": frame})
+        for force in unknown:
+            solved(force[0])
+
+    return steps
+
+
+class Reactions(ExplicitComponent):
+
+    # the three reactions of the whole truss from its force and moment equilibrium, for trusses where no joint can
+    # be solved before the reactions are known
+
+    def initialize(self):
+        self.options.declare("reaction_points", desc = "(3, 2) array of the coordinates of the node of each reaction force")
+        self.options.declare("load_points", desc = "(n_loads, 2) array of the coordinates of the node of each applied force")
+
+    def setup(self):
+        n_loads = len(self.options["load_points"])
+        self.add_input("reaction_direction", val = np.zeros(3), units = "rad", desc = "Direction of each reaction force")
+        self.add_input("ext", val = np.zeros(n_loads), units = "N", desc = "Forces applied to beam structure")
+        self.add_input("ext_direction", val = np.zeros(n_loads), units = "rad", desc = "Direction of forces applied to beam structure")
+        self.add_output("reaction", val = np.zeros(3), units = "N", desc = "Reaction forces")
+        self.declare_partials("reaction", "*")
+
+    def _equilibrium(self, points, direction):
+        # x force, y force and moment about the origin of a unit force along direction at each point
+        c, s = np.cos(direction), np.sin(direction)
+        return np.array([c, s, points[:, 0] * s - points[:, 1] * c]), np.array([-s, c, points[:, 0] * c + points[:, 1] * s])
+
+    def compute(self, inputs, outputs):
+        M = self._equilibrium(np.asarray(self.options["reaction_points"]), inputs["reaction_direction"])[0]
+        b = self._equilibrium(np.asarray(self.options["load_points"]).reshape(-1, 2), inputs["ext_direction"])[0]
+        outputs["reaction"] = -np.linalg.solve(M, b @ inputs["ext"])
+
+    def compute_partials(self, inputs, J):
+        M, dM = self._equilibrium(np.asarray(self.options["reaction_points"]), inputs["reaction_direction"])
+        b, db = self._equilibrium(np.asarray(self.options["load_points"]).reshape(-1, 2), inputs["ext_direction"])
+        reaction = -np.linalg.solve(M, b @ inputs["ext"])
+        J["reaction", "ext"] = -np.linalg.solve(M, b)
+        J["reaction", "ext_direction"] = -np.linalg.solve(M, db * inputs["ext"])
+        J["reaction", "reaction_direction"] = -np.linalg.solve(M, dM * reaction)
+
+
+class Joints_Model(Group):
+
+    # explicit analysis of a statically determinate truss, one V2 Node per joint in the order found by plan_joints,
+    # so a single pass through the model solves every force without a Newton loop. Takes the same TrussGeometry and
+    # has the same outputs as Truss_Model, with the forces gathered in force.force.
+
+    def initialize(self):
+        self.options.declare("geometry", default = None, desc = "TrussGeometry describing nodes, members, supports and loads")
+        self.options.declare("tension", default = 400., desc = "Allowable tensile stress in MPa, scalar or one per member")
+        self.options.declare("compression", default = 400., desc = "Allowable compressive stress magnitude in MPa, scalar or one per member")
+        self.options.declare("ks", default = False, types = bool, desc = "Add the KS aggregate of the stress margins as con.con_ks")
+        self.options.declare("density", default = None, desc = "Density of each member in kg/m**3, the objective is volume when None")
+
+    def setup(self):
+        geometry = self.options["geometry"]
+        n_members = geometry.n_members
+        n_forces = n_members + geometry.n_reactions
+        self.steps = plan_joints(geometry)
+
+        indeps = self.add_subsystem("indeps", IndepVarComp())
+        indeps.add_output("end_direction", geometry.end_directions(), units = "rad", desc = "Direction of each beam at its 0th and 1st end")
+        indeps.add_output("L", geometry.lengths(), units = "m", desc = "Length of each beam")
+        indeps.add_output("reaction_direction", geometry.reaction_directions, units = "rad", desc = "Direction of each reaction force")
+        indeps.add_output("ext", geometry.load_forces, units = "N", desc = "Forces applied to beam structure")
+        indeps.add_output("ext_direction", geometry.load_directions, units = "rad", desc = "Direction of forces applied to beam structure")
+        indeps.add_output("A", geometry.areas, units = "m**2", desc = "Cross sectional area of each beam")
+
+        # output and index each force is found in once its joint has been added
+        source = {}
+        for step in self.steps:
+            if step["node"] is None:
+                self.add_subsystem("reactions", Reactions(reaction_points = geometry.nodes[geometry.reaction_nodes],
+                                                          load_points = geometry.nodes[geometry.load_nodes]))
+                self.connect("indeps.reaction_direction", "reactions.reaction_direction")
+                self.connect("indeps.ext", "reactions.ext")
+                self.connect("indeps.ext_direction", "reactions.ext_direction")
+                for j, force in enumerate(step["unknown"]):
+                    source[force] = ("reactions.reaction", j)
+                continue
+
+            name = f"joint{step['node']}"
+            known = [(source[force], direction) for force, direction, _ in step["known"]]
+            known += [(("indeps.ext", l), ("ext_direction", l)) for l in step["loads"]]
+            self.add_subsystem(name, Node(n_known = len(known), n_unknown = len(step["unknown"]),
+                                          solve_first = step["solve_first"], frame = step["frame"]))
+
+            for i, ((force_src, force_idx), (direction_src, direction_idx)) in enumerate(known):
+                self.connect(force_src, f"{name}.known_force {i + 1}", src_indices = [force_idx])
+                self.connect(f"indeps.{direction_src}", f"{name}.old_direction {i + 1}", src_indices = [direction_idx], flat_src_indices = True)
+            for i, (force, (direction_src, direction_idx), _) in enumerate(step["unknown"]):
+                self.connect(f"indeps.{direction_src}", f"{name}.new_direction {i + 1}", src_indices = [direction_idx], flat_src_indices = True)
+                source[force] = (f"{name}.new_truss {i + 1}", 0)
+
+        # member forces followed by reactions, like cycle.truss.force of Truss_Model
+        force = self.add_subsystem("force", MuxComp(vec_size = n_forces))
+        force.add_var("force", shape = (1,), axis = 0, units = "N")
+        for k in range(n_forces):
+            self.connect(source[k][0], f"force.force_{k}", src_indices = [source[k][1]])
+
+        self.add_subsystem("stress", MemberStress(n_members = n_members, n_reactions = geometry.n_reactions))
+        self.connect("force.force", "stress.force")
+        self.connect("indeps.A", ["stress.A", "obj_cmp.A"])
+
+        self.add_subsystem("obj_cmp", StructuralMass(n_members = n_members, density = self.options["density"]))
+        self.add_subsystem("con", StressConstraint(n_members = n_members, tension = self.options["tension"],
+                                                   compression = self.options["compression"], ks = self.options["ks"]))
+
+        self.connect("indeps.L", "obj_cmp.L")
+        self.connect("stress.sigma", "con.sigma")
+
+
+if __name__ == "__main__":
+
+    from seven_truss_V4 import seven_truss_geometry
+    from openmdao.api import Problem, ScipyOptimizeDriver
+
+    prob = Problem()
+    prob.model = Joints_Model(geometry = seven_truss_geometry())
+
+    prob.driver = ScipyOptimizeDriver()
+    prob.driver.options["optimizer"] = "SLSQP"
+    prob.driver.declare_coloring()
+
+    prob.model.add_design_var("indeps.A", lower = 0.001, upper = 100)
+    prob.model.add_objective("obj_cmp.obj")
+    prob.model.add_constraint("con.con", lower = 0)
+
+    prob.setup(mode = "rev", force_alloc_complex = True)
+    # prob.check_partials(compact_print = True, method = "cs")
+
+    for step in prob.model.steps:
+        if step["node"] is None:
+            print("reactions from the equilibrium of the whole truss")
+        else:
+            print(f"node {step['node']}: forces {[force for force, _, _ in step['unknown']]}, {step['solve_first']} first, frame {step['frame']:.4f} rad")
+
+    prob.run_driver()
+
+    print("minimum found at")
+    print("A = ", prob["indeps.A"])
+    print("beam_force", prob["force.force"][:7].ravel())
+    print("reaction", prob["force.force"][7:].ravel())
@@ -0,0 +1,207 @@
+import os
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# the kernels behind TrussSystem and MemberStress, as vectorized NumPy and as loops compiled by Numba. Numba is used
+# when it is installed unless TRUSS_BACKEND=numpy, and every component can also pick a backend with its options.
+BACKENDS = ["numpy", "numba"] if numba is not None else ["numpy"]
+DEFAULT_BACKEND = os.environ.get("TRUSS_BACKEND", BACKENDS[-1])
+if DEFAULT_BACKEND not in BACKENDS:
+    raise ImportError(f"TRUSS_BACKEND={DEFAULT_BACKEND} is not available, choose from {BACKENDS}.")
+
+
+def _common(*arrays):
+    # Numba compiles one specialization per argument types, so every float argument shares one dtype, complex
+    # under complex step
+    dtype = np.result_type(*arrays)
+    return [np.ascontiguousarray(a, dtype = dtype) for a in arrays]
+
+
+# NumPy, the x and y rows of every end of every force are scattered with np.add.at
+
+def _residual_numpy(n_nodes, members, reaction_nodes, load_nodes, direction, reaction_direction, ext, ext_direction, force):
+    n_members = len(members)
+    cos_m, sin_m = np.cos(direction), np.sin(direction)
+    member_force, reaction = force[:, :n_members], force[:, n_members:]
+    eq = np.zeros((len(force), n_nodes, 2), dtype = np.result_type(direction, reaction_direction, ext, ext_direction, force))
+    np.add.at(eq, (slice(None), members[:, 0], 0), member_force * cos_m)
+    np.add.at(eq, (slice(None), members[:, 0], 1), member_force * sin_m)
+    np.add.at(eq, (slice(None), members[:, 1], 0), -member_force * cos_m)
+    np.add.at(eq, (slice(None), members[:, 1], 1), -member_force * sin_m)
+    np.add.at(eq, (slice(None), reaction_nodes, 0), reaction * np.cos(reaction_direction))
+    np.add.at(eq, (slice(None), reaction_nodes, 1), reaction * np.sin(reaction_direction))
+    np.add.at(eq, (slice(None), load_nodes, 0), ext * np.cos(ext_direction))
+    np.add.at(eq, (slice(None), load_nodes, 1), ext * np.sin(ext_direction))
+    return eq.reshape(len(force), -1)
+
+def _partials_numpy(n_members, direction, reaction_direction, ext, ext_direction, force):
+    # values in the (case, x0, y0, x1, y1) ordering of the rows TrussSystem declares
+    cos_m, sin_m = np.cos(direction), np.sin(direction)
+    cos_r, sin_r = np.cos(reaction_direction), np.sin(reaction_direction)
+    cos_e, sin_e = np.cos(ext_direction.ravel()), np.sin(ext_direction.ravel())
+    member_force, reaction = force[:, :n_members], force[:, n_members:]
+    d_force = np.tile(np.concatenate([np.column_stack([cos_m, sin_m, -cos_m, -sin_m]).ravel(), np.column_stack([cos_r, sin_r]).ravel()]), len(force))
+    d_direction = np.stack([-member_force * sin_m, member_force * cos_m, member_force * sin_m, -member_force * cos_m], axis = -1).ravel()
+    d_reaction_direction = np.stack([-reaction * sin_r, reaction * cos_r], axis = -1).ravel()
+    d_ext = np.column_stack([cos_e, sin_e]).ravel()
+    d_ext_direction = np.column_stack([-ext.ravel() * sin_e, ext.ravel() * cos_e]).ravel()
+    return d_force, d_direction, d_reaction_direction, d_ext, d_ext_direction
+
+def _stress_numpy(n_members, force, A):
+    return force[:, :n_members] / (1e6 * A)
+
+def _stress_partials_numpy(n_members, force, A):
+    return np.tile(1 / (1e6 * A), len(force)), (-force[:, :n_members] / (1e6 * A ** 2)).ravel()
+
+
+# Numba, the same kernels as single passes over members, reactions and loads
+
+def _residual_loops(n_nodes, members, reaction_nodes, load_nodes, direction, reaction_direction, ext, ext_direction, force):
+    n_cases, n_members = force.shape[0], members.shape[0]
+    eq = np.zeros((n_cases, 2 * n_nodes), dtype = force.dtype)
+    for m in range(n_members):
+        c, s = np.cos(direction[m]), np.sin(direction[m])
+        a, b = 2 * members[m, 0], 2 * members[m, 1]
+        for k in range(n_cases):
+            f = force[k, m]
+            eq[k, a] += f * c
+            eq[k, a + 1] += f * s
+            eq[k, b] -= f * c
+            eq[k, b + 1] -= f * s
+    for r in range(reaction_nodes.shape[0]):
+        c, s = np.cos(reaction_direction[r]), np.sin(reaction_direction[r])
+        a = 2 * reaction_nodes[r]
+        for k in range(n_cases):
+            eq[k, a] += force[k, n_members + r] * c
+            eq[k, a + 1] += force[k, n_members + r] * s
+    for k in range(n_cases):
+        for l in range(load_nodes.shape[0]):
+            a = 2 * load_nodes[l]
+            eq[k, a] += ext[k, l] * np.cos(ext_direction[k, l])
+            eq[k, a + 1] += ext[k, l] * np.sin(ext_direction[k, l])
+    return eq
+
+def _partials_loops(n_members, direction, reaction_direction, ext, ext_direction, force):
+    n_cases, n_forces = force.shape
+    n_reactions = n_forces - n_members
+    n_loads = ext.shape[1]
+    d_force = np.empty(n_cases * (4 * n_members + 2 * n_reactions), dtype = force.dtype)
+    d_direction = np.empty(n_cases * 4 * n_members, dtype = force.dtype)
+    d_reaction_direction = np.empty(n_cases * 2 * n_reactions, dtype = force.dtype)
+    d_ext = np.empty(n_cases * 2 * n_loads, dtype = force.dtype)
+    d_ext_direction = np.empty(n_cases * 2 * n_loads, dtype = force.dtype)
+    for m in range(n_members):
+        c, s = np.cos(direction[m]), np.sin(direction[m])
+        for k in range(n_cases):
+            i = k * (4 * n_members + 2 * n_reactions) + 4 * m
+            d_force[i], d_force[i + 1], d_force[i + 2], d_force[i + 3] = c, s, -c, -s
+            f = force[k, m]
+            i = 4 * (k * n_members + m)
+            d_direction[i], d_direction[i + 1], d_direction[i + 2], d_direction[i + 3] = -f * s, f * c, f * s, -f * c
+    for r in range(n_reactions):
+        c, s = np.cos(reaction_direction[r]), np.sin(reaction_direction[r])
+        for k in range(n_cases):
+            i = k * (4 * n_members + 2 * n_reactions) + 4 * n_members + 2 * r
+            d_force[i], d_force[i + 1] = c, s
+            f = force[k, n_members + r]
+            i = 2 * (k * n_reactions + r)
+            d_reaction_direction[i], d_reaction_direction[i + 1] = -f * s, f * c
+    for k in range(n_cases):
+        for l in range(n_loads):
+            c, s = np.cos(ext_direction[k, l]), np.sin(ext_direction[k, l])
+            i = 2 * (k * n_loads + l)
+            d_ext[i], d_ext[i + 1] = c, s
+            d_ext_direction[i], d_ext_direction[i + 1] = -ext[k, l] * s, ext[k, l] * c
+    return d_force, d_direction, d_reaction_direction, d_ext, d_ext_direction
+
+def _stress_loops(n_members, force, A):
+    sigma = np.empty((force.shape[0], n_members), dtype = force.dtype)
+    for k in range(force.shape[0]):
+        for m in range(n_members):
+            sigma[k, m] = force[k, m] / (1e6 * A[m])
+    return sigma
+
+def _stress_partials_loops(n_members, force, A):
+    d_force = np.empty(force.shape[0] * n_members, dtype = force.dtype)
+    d_A = np.empty(force.shape[0] * n_members, dtype = force.dtype)
+    for k in range(force.shape[0]):
+        for m in range(n_members):
+            d_force[k * n_members + m] = 1 / (1e6 * A[m])
+            d_A[k * n_members + m] = -force[k, m] / (1e6 * A[m] ** 2)
+    return d_force, d_A
+
+if numba is not None:
+    _residual_loops = numba.njit(cache = True)(_residual_loops)
+    _partials_loops = numba.njit(cache = True)(_partials_loops)
+    _stress_loops = numba.njit(cache = True)(_stress_loops)
+    _stress_partials_loops = numba.njit(cache = True)(_stress_partials_loops)
+
+
+def check_backend(backend):
+    # None follows DEFAULT_BACKEND, components call this in setup so a missing Numba fails before the first solve
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f"The {backend} backend is not available, choose from {BACKENDS}.")
+
+
+# entry points, force, ext and ext_direction are (n_cases, n) arrays
+
+def equilibrium_residual(n_nodes, members, reaction_nodes, load_nodes, direction, reaction_direction, ext, ext_direction, force, backend = None):
+    # x and y force sums at every node, (n_cases, 2 n_nodes)
+    if (backend or DEFAULT_BACKEND) == "numba":
+        return _residual_loops(n_nodes, members, reaction_nodes, load_nodes, *_common(direction, reaction_direction, ext, ext_direction, force))
+    return _residual_numpy(n_nodes, members, reaction_nodes, load_nodes, direction, reaction_direction, ext, ext_direction, force)
+
+def equilibrium_partials(n_members, direction, reaction_direction, ext, ext_direction, force, backend = None):
+    # partials of the residual wrt force, direction, reaction_direction, ext and ext_direction
+    if (backend or DEFAULT_BACKEND) == "numba":
+        return _partials_loops(n_members, *_common(direction, reaction_direction, ext, ext_direction, force))
+    return _partials_numpy(n_members, direction, reaction_direction, ext, ext_direction, force)
+
+def member_stress(n_members, force, A, backend = None):
+    # stress in MPa of every member, (n_cases, n_members)
+    if (backend or DEFAULT_BACKEND) == "numba":
+        return _stress_loops(n_members, *_common(force, A))
+    return _stress_numpy(n_members, force, A)
+
+def member_stress_partials(n_members, force, A, backend = None):
+    # partials of the stress wrt force and A, on the member diagonal of every load case
+    if (backend or DEFAULT_BACKEND) == "numba":
+        return _stress_partials_loops(n_members, *_common(force, A))
+    return _stress_partials_numpy(n_members, force, A)
+
+
+if __name__ == "__main__":
+
+    import time
+    from truss_generators import pratt
+
+    # time both backends on the kernels of one analysis, after a first call so compilation is not counted
+    if numba is None:
+        print("Numba is not installed, only the numpy backend is available")
+
+    for n_panels in (2, 25, 250, 2500, 25000):
+        g = pratt(n_panels)
+        rng = np.random.default_rng(0)
+        force = rng.normal(size = (1, g.n_members + g.n_reactions))
+        args = (g.directions(), g.reaction_directions, g.load_forces.reshape(1, -1), g.load_directions.reshape(1, -1), force)
+        timings = []
+        for backend in BACKENDS:
+            equilibrium_residual(g.n_nodes, g.members, g.reaction_nodes, g.load_nodes, *args, backend = backend)
+            equilibrium_partials(g.n_members, *args, backend = backend)
+            repeat = max(3, 10000 // n_panels)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                equilibrium_residual(g.n_nodes, g.members, g.reaction_nodes, g.load_nodes, *args, backend = backend)
+            residual = (time.perf_counter() - start) / repeat
+            start = time.perf_counter()
+            for _ in range(repeat):
+                equilibrium_partials(g.n_members, *args, backend = backend)
+            timings.append((residual, (time.perf_counter() - start) / repeat))
+        line = f"{g.n_members:>7} members  " + "  ".join(f"{b} residual {r * 1e6:9.1f} us  partials {p * 1e6:9.1f} us" for b, (r, p) in zip(BACKENDS, timings))
+        if len(timings) > 1:
+            line += f"  speedup {timings[0][0] / timings[1][0]:.1f}x / {timings[0][1] / timings[1][1]:.1f}x"
+        print(line)
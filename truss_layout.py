@@ -0,0 +1,206 @@
+import math
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import hstack
+from truss_builder import TrussGeometry
+from truss_V4 import equilibrium_matrix, point_pattern, point_values
+
+
+def ground_structure(nodes, max_length = None, spacing = None):
+    # candidate members joining every pair of nodes no further apart than max_length. For nodes on a grid of the
+    # given spacing, a member passing through another node is left out since the two shorter members it overlaps
+    # are candidates too, which keeps only pairs whose grid offsets have no common divisor.
+    nodes = np.asarray(nodes, dtype = float).reshape(-1, 2)
+    i, j = np.triu_indices(len(nodes), k = 1)
+    d = nodes[j] - nodes[i]
+    keep = np.ones(len(i), dtype = bool)
+    if max_length is not None:
+        keep &= np.hypot(d[:, 0], d[:, 1]) <= max_length * (1 + 1e-12)
+    if spacing is not None:
+        steps = np.rint(np.abs(d) / spacing).astype(int)
+        keep &= np.gcd(steps[:, 0], steps[:, 1]) == 1
+    return np.column_stack([i[keep], j[keep]])
+
+def grid_nodes(nx, ny, spacing = 1.):
+    # (nx + 1) (ny + 1) nodes numbered along x first, node i + (nx + 1) j at (i, j) spacing
+    x, y = np.meshgrid(np.arange(nx + 1) * spacing, np.arange(ny + 1) * spacing)
+    return np.column_stack([x.ravel(), y.ravel()])
+
+
+def _layout_lp(geometry, members, directions, L, tension, compression, f):
+    # LP over the candidate members in members, with every member force split into a tension part and a
+    # compression part, both >= 0, so the volume sum(L (q+ / tension + q- / compression)) is linear and the nodal
+    # equilibrium B (q+ - q-) + R r = -f uses the sparse equilibrium matrix of TrussSystem
+    n_members = len(members)
+    B = equilibrium_matrix(geometry.n_nodes, geometry.members[members], directions[members], geometry.reaction_nodes, geometry.reaction_directions)
+    B_members = B[:, :n_members]
+    A_eq = hstack([B_members, -B_members, B[:, n_members:]], format = "csc")
+    c = np.concatenate([L[members] / tension[members], L[members] / compression[members], np.zeros(geometry.n_reactions)])
+    bounds = np.zeros((len(c), 2))
+    bounds[:, 1] = np.inf
+    bounds[2 * n_members:, 0] = -np.inf
+    # the interior point method with crossover beats dual simplex several times over on these LPs
+    return linprog(c, A_eq = A_eq, b_eq = -f, bounds = bounds, method = "highs-ipm")
+
+def _virtual_strain(geometry, directions, L, y):
+    # the duals of the equilibrium equations are virtual nodal displacements, and the strain they give every
+    # candidate member is its work per unit volume, which must stay within 1 / tension and -1 / compression
+    u = y.reshape(-1, 2)
+    du = u[geometry.members[:, 0]] - u[geometry.members[:, 1]]
+    return (np.cos(directions) * du[:, 0] + np.sin(directions) * du[:, 1]) / L
+
+def _topology(geometry, members, areas, tol = 1e-9):
+    # a node held by only two members in line carries no load or support, and the LP sizes both members alike, so
+    # they are joined into one member. Every such node left in would have a zero stiffness across the members and
+    # make the truss a mechanism for the V3 and V4 analyses.
+    members = [list(ends) for ends in members]
+    areas = list(areas)
+    fixed = set(geometry.reaction_nodes) | set(geometry.load_nodes)
+    at_node = {}
+    for k, (a, b) in enumerate(members):
+        at_node.setdefault(a, []).append(k)
+        at_node.setdefault(b, []).append(k)
+    for node, ends in at_node.items():
+        if node in fixed or len(ends) != 2:
+            continue
+        k, l = ends
+        far = [members[k][0] if members[k][1] == node else members[k][1], members[l][0] if members[l][1] == node else members[l][1]]
+        u, v = geometry.nodes[far[0]] - geometry.nodes[node], geometry.nodes[far[1]] - geometry.nodes[node]
+        if abs(u[0] * v[1] - u[1] * v[0]) > tol * np.hypot(*u) * np.hypot(*v) or np.dot(u, v) > 0:
+            continue
+        # member l is removed and member k now spans both, the far end of l now ends at member k
+        members[k] = far
+        areas[k] = max(areas[k], areas[l])
+        members[l] = None
+        at_node[far[1]] = [k if m == l else m for m in at_node[far[1]]]
+        at_node[node] = []
+    kept = [k for k, ends in enumerate(members) if ends is not None]
+    members = np.array([members[k] for k in kept], dtype = int).reshape(-1, 2)
+    areas = np.array([areas[k] for k in kept])
+
+    # renumber the nodes that are still used by a member, a support or a load
+    used = np.zeros(geometry.n_nodes, dtype = bool)
+    used[members.ravel()] = True
+    used[geometry.reaction_nodes] = True
+    used[geometry.load_nodes] = True
+    index = np.cumsum(used) - 1
+    return TrussGeometry.from_arrays(geometry.nodes[used], index[members], index[geometry.reaction_nodes], geometry.reaction_directions,
+                                     index[geometry.load_nodes], geometry.load_forces, geometry.load_directions, areas)
+
+def optimize_layout(geometry, tension = 400., compression = 400., prune = 1e-6, adaptive = False, initial_length = None, tol = 1e-4, margin = .2):
+    # minimum volume plastic design of the candidate members of geometry, which carries the nodes, the members of
+    # the ground structure, supports and a single load case, solved as one sparse LP with HiGHS. With adaptive the
+    # LP starts from the candidates no longer than initial_length, by default 1.5 times the longest of the
+    # shortest candidates at every node, and adds the candidates whose virtual strain in the dual solution breaks
+    # the stress limits by more than tol until none does. The volume is then within a factor 1 + tol of the
+    # optimum over every candidate, found with LPs about half the size, which pays off when memory rather than
+    # time limits the ground structure. Returns the volume in m**3, the area and
+    # force of every candidate member, the reactions, the number of LPs solved and the optimal topology, a
+    # TrussGeometry of the members with areas above prune times the largest one, sized to their optimal areas,
+    # with unused nodes removed and straight chains of members joined into one member. An optimal layout only has
+    # to carry its own load, so it can still be a mechanism, e.g. a member in line with its roller; the topology is
+    # ready for the V3 and V4 analyses when 2 n_nodes = n_members + n_reactions.
+    if geometry.n_cases != 1:
+        raise ValueError("The layout LP takes a single load case.")
+    n_members = geometry.n_members
+    tension = np.broadcast_to(np.asarray(tension, dtype = float), (n_members,))
+    compression = np.broadcast_to(np.asarray(compression, dtype = float), (n_members,))
+    directions = geometry.directions()
+    L = geometry.lengths()
+
+    # forces of 1e7 N against volumes of 1e-8 m**3 per N leave HiGHS badly scaled, so the LP is solved for forces
+    # relative to the largest load and volumes in m * N / MPa, then scaled back
+    rows, _ = point_pattern(geometry.load_nodes)
+    f = np.zeros(2 * geometry.n_nodes)
+    np.add.at(f, rows, point_values(geometry.load_directions) * np.repeat(geometry.load_forces, 2))
+    scale = np.abs(f).max()
+    f = f / scale
+
+    if adaptive:
+        if initial_length is None:
+            shortest = np.full(geometry.n_nodes, np.inf)
+            np.minimum.at(shortest, geometry.members.ravel(), np.repeat(L, 2))
+            initial_length = 1.5 * shortest[np.isfinite(shortest)].max()
+        active = np.zeros(n_members, dtype = bool)
+        active[L <= initial_length * (1 + 1e-12)] = True
+    else:
+        active = np.ones(n_members, dtype = bool)
+
+    n_lps = 0
+    while True:
+        members = np.nonzero(active)[0]
+        result = _layout_lp(geometry, members, directions, L, tension, compression, f)
+        n_lps += 1
+        if result.status == 2 and not active.all():
+            # the short members cannot carry the loads, so allow members twice as long
+            initial_length *= 2
+            active[L <= initial_length * (1 + 1e-12)] = True
+            continue
+        if result.status != 0:
+            raise ValueError(f"The layout LP failed, {result.message}")
+        if active.all():
+            break
+
+        strain = _virtual_strain(geometry, directions, L, result.eqlin.marginals)
+        violation = np.maximum(strain * tension, -strain * compression) - 1
+        violation[active] = 0
+        if violation.max() <= tol:
+            break
+        # the duals of these degenerate LPs are far from unique, so adding only the violated members lets the next
+        # dual violate a few others and the loop crawls. Members within margin of their limit are added with them.
+        added = np.nonzero(violation > -margin)[0]
+        added = added[~active[added]]
+        # the worst violations first, at most as many as the members already in the LP so it grows geometrically
+        added = added[np.argsort(-violation[added])[:max(len(members), 100)]]
+        active[added] = True
+
+    x = np.zeros(2 * n_members)
+    x[members] = result.x[:len(members)] * scale
+    x[n_members + members] = result.x[len(members):2 * len(members)] * scale
+    q_tension, q_compression = x[:n_members], x[n_members:]
+    areas = q_tension / (1e6 * tension) + q_compression / (1e6 * compression)
+    force = q_tension - q_compression
+    kept = np.nonzero(areas > prune * areas.max())[0]
+
+    topology = _topology(geometry, geometry.members[kept], areas[kept])
+    return {"volume": result.fun * scale / 1e6, "areas": areas, "force": force, "reaction": result.x[2 * len(members):] * scale,
+            "members": kept, "n_lps": n_lps, "topology": topology}
+
+
+if __name__ == "__main__":
+
+    import time
+    from truss_builder import Truss_V3_Model
+    from openmdao.api import Problem
+    from truss_generators import F
+
+    def bridge(nx, ny, max_length = None):
+        # pinned at the bottom left node, on a roller at the bottom right node and loaded at the bottom middle node
+        nodes = grid_nodes(nx, ny)
+        members = ground_structure(nodes, max_length = max_length, spacing = 1.)
+        supports = [[0, 0], [0, math.pi / 2], [nx, math.pi / 2]]
+        return TrussGeometry(nodes, members, supports, [[nx // 2, F, math.pi * 3 / 2]])
+
+    # small layouts sized by the V3 Beam and Node analysis, whose stresses should all be at the allowable
+    for nx, ny in ((6, 2), (12, 4)):
+        layout = optimize_layout(bridge(nx, ny))
+        topology = layout["topology"]
+        print(f"{bridge(nx, ny).n_members} candidates -> {topology.n_members} members on {topology.n_nodes} nodes, volume {layout['volume']:.6g} m**3")
+        if 2 * topology.n_nodes != topology.n_members + topology.n_reactions:
+            print(f"  not statically determinate, {2 * topology.n_nodes} equations for {topology.n_members + topology.n_reactions} forces")
+            continue
+        prob = Problem(Truss_V3_Model(geometry = topology), reports = None)
+        prob.setup()
+        prob.set_solver_print(level = -1)
+        prob.run_model()
+        print(f"  V3 analysis: volume {prob['obj_cmp.obj'][0]:.6g} m**3, |stress| from {np.abs(prob['stress.sigma']).min():.6g} "
+              f"to {np.abs(prob['stress.sigma']).max():.6g} MPa")
+
+    # ground structures up to a few hundred thousand candidates, with and without adding members adaptively
+    for nx, ny in ((20, 10), (30, 15), (40, 20)):
+        geometry = bridge(nx, ny)
+        for adaptive in (False, True):
+            start = time.perf_counter()
+            layout = optimize_layout(geometry, adaptive = adaptive)
+            print(f"{geometry.n_members:>7} candidates  adaptive {str(adaptive):<6} {time.perf_counter() - start:7.2f} s  {layout['n_lps']:>3} LPs  "
+                  f"volume {layout['volume']:.6g} m**3  {layout['topology'].n_members} members")
@@ -0,0 +1,159 @@
+import json
+import time
+from collections import defaultdict
+from openmdao.core.component import Component
+from openmdao.api import ExplicitComponent, ImplicitComponent, NewtonSolver, DirectSolver
+
+# component methods written by this repo or by OpenMDAO's own components, timed when a class overrides them
+COMPONENT_METHODS = ["apply_nonlinear", "solve_nonlinear", "guess_nonlinear", "linearize", "compute", "compute_partials",
+                     "apply_linear", "solve_linear", "compute_jacvec_product"]
+_BASES = (Component, ExplicitComponent, ImplicitComponent)
+
+
+class Profiler(object):
+
+    # times every component hot path, every group data transfer and every solver of a problem while it is active.
+    # The timers are attributes set on the instances of the problem's systems and solvers when profiling starts
+    # and deleted when it stops, so a problem that is not being profiled runs the original methods untouched.
+    #
+    #     with Profiler(prob) as prof:
+    #         prob.run_driver()
+    #     print(prof.report())
+    #     prof.write_trace("trace.json")
+
+    def __init__(self, prob, trace = True):
+        self.prob = prob
+        self.trace = trace
+        self.calls = defaultdict(int)
+        self.times = defaultdict(int)
+        self.events = []
+        self.wall = 0
+        self._patched = []
+
+    def _wrap(self, obj, name, key, category):
+        method = getattr(obj, name)
+        calls, times, events, trace = self.calls, self.times, self.events, self.trace
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                end = time.perf_counter_ns()
+                calls[key] += 1
+                times[key] += end - start
+                if trace:
+                    events.append((key, category, start, end))
+
+        setattr(obj, name, timed)
+        self._patched.append((obj, name))
+
+    def _install(self):
+        for system in self.prob.model.system_iter(include_self = True, recurse = True):
+            path = system.pathname or "<model>"
+            cls = type(system)
+            if isinstance(system, Component):
+                for name in COMPONENT_METHODS:
+                    owner = next((c for c in cls.__mro__ if name in c.__dict__), None)
+                    if owner is not None and owner not in _BASES:
+                        self._wrap(system, name, (path, cls.__name__, name), "component")
+            else:
+                self._wrap(system, "_transfer", (path, cls.__name__, "transfer"), "transfer")
+
+            for solver in (system.nonlinear_solver, system.linear_solver):
+                if solver is None:
+                    continue
+                solver_name = type(solver).__name__
+                self._wrap(solver, "solve", (path, solver_name, "solve"), "solver")
+                if isinstance(solver, NewtonSolver):
+                    self._wrap(solver, "_single_iteration", (path, solver_name, "iteration"), "solver")
+                if isinstance(solver, DirectSolver):
+                    self._wrap(solver, "_linearize", (path, solver_name, "factorize"), "solver")
+
+    def __enter__(self):
+        self.prob.final_setup()
+        self._install()
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        self.wall += time.perf_counter_ns() - self._start
+        for obj, name in self._patched:
+            delattr(obj, name)
+        self._patched = []
+
+    @property
+    def newton_iterations(self):
+        return sum(n for key, n in self.calls.items() if key[2] == "iteration")
+
+    def stats(self):
+        # one row per timed method, by decreasing cumulative time. Solver and group times include the time of the
+        # components and solvers they call, component times do not include anything else.
+        iterations = self.newton_iterations
+        rows = []
+        for key, total in sorted(self.times.items(), key = lambda item: -item[1]):
+            rows.append({"system": key[0], "class": key[1], "method": key[2], "calls": self.calls[key], "total_s": total * 1e-9,
+                         "per_call_us": total * 1e-3 / self.calls[key], "per_newton_iteration_ms": total * 1e-6 / iterations if iterations else None})
+        return rows
+
+    def report(self, limit = 30, by = "method"):
+        # the heaviest methods of every system, or with by = "class" the same method summed over every system of a
+        # class, e.g. Node.apply_nonlinear over all nodes
+        rows = self.stats()
+        if by == "class":
+            merged = {}
+            for row in rows:
+                key = (row["class"], row["method"])
+                if key not in merged:
+                    merged[key] = {"system": row["system"], "systems": 0, "class": row["class"], "method": row["method"], "calls": 0, "total_s": 0.}
+                merged[key]["systems"] += 1
+                merged[key]["calls"] += row["calls"]
+                merged[key]["total_s"] += row["total_s"]
+            rows = sorted(merged.values(), key = lambda row: -row["total_s"])
+            iterations = self.newton_iterations
+            for row in rows:
+                if row["systems"] > 1:
+                    row["system"] = f"{row['systems']} systems"
+                row["per_call_us"] = row["total_s"] * 1e6 / row["calls"]
+                row["per_newton_iteration_ms"] = row["total_s"] * 1e3 / iterations if iterations else None
+
+        wall = self.wall * 1e-9
+        lines = [f"wall time {wall:.4f} s, {self.newton_iterations} Newton iterations",
+                 f"{'system':<32}{'class':<24}{'method':<18}{'calls':>9}{'total s':>11}{'% wall':>8}{'us/call':>11}{'ms/iter':>10}"]
+        for row in rows[:limit]:
+            per_iteration = "-" if row["per_newton_iteration_ms"] is None else f"{row['per_newton_iteration_ms']:.4f}"
+            lines.append(f"{row['system'][-31:]:<32}{row['class'][:23]:<24}{row['method']:<18}{row['calls']:>9}{row['total_s']:>11.4f}"
+                         f"{100 * row['total_s'] / wall if wall else 0:>8.1f}{row['per_call_us']:>11.1f}{per_iteration:>10}")
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        # Chrome trace event format, open in chrome://tracing or https://ui.perfetto.dev
+        if not self.events:
+            raise ValueError("No events were recorded, profile with trace = True to write a timeline.")
+        origin = min(event[2] for event in self.events)
+        events = [{"name": f"{key[0]} {key[2]}", "cat": category, "ph": "X", "ts": (start - origin) / 1e3, "dur": (end - start) / 1e3,
+                   "pid": 0, "tid": 0, "args": {"class": key[1]}} for key, category, start, end in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+if __name__ == "__main__":
+
+    from truss_generators import pratt
+    from truss_builder import Truss_V3_Model
+    from openmdao.api import Problem
+
+    # where a V3 Newton solve of a 101 member pratt truss spends its time
+    prob = Problem(Truss_V3_Model(geometry = pratt(25)), reports = None)
+    prob.setup()
+    prob.final_setup()
+    prob.set_solver_print(level = -1)
+
+    with Profiler(prob) as prof:
+        prob.run_model()
+        prob.compute_totals(of = ["con.con"], wrt = ["indeps.A"])
+
+    print(prof.report(limit = 15))
+    print()
+    print(prof.report(by = "class"))
+    prof.write_trace("truss_profile_trace.json")
@@ -0,0 +1,136 @@
+import numpy as np
+from openmdao.recorders.case_recorder import CaseRecorder
+from truss_io import ColumnWriter, read_columns
+
+
+class HistoryRecorder(CaseRecorder):
+
+    # driver recorder that streams every recorded driver iteration to a ColumnWriter store, one column per design
+    # variable, objective and constraint plus the iteration number, timestamp, success flag and the cumulative
+    # Newton iterations, Newton solves and solution cache hits of the model. Rows are buffered and written buffer
+    # rows at a time, and with every = n only every nth iteration is kept, although the last iteration of a run
+    # is always written.
+    #
+    #     prob.driver.add_recorder(HistoryRecorder("history"))
+    #     prob.run_driver()
+    #     history = read_history("history")
+    #     history["obj_cmp.obj"], history["newton_iterations"]
+
+    def __init__(self, path, every = 1, buffer = 32):
+        super().__init__(record_viewer_data = False)
+        self.path = path
+        self.every = every
+        self.buffer = buffer
+        self._writer = None
+
+    def startup(self, recording_requester, comm = None):
+        super().startup(recording_requester, comm)
+        self._writer = ColumnWriter(self.path)
+        self._rows = []
+        self._skipped = None
+        problem = recording_requester._problem()
+        self._solvers = [system.nonlinear_solver for system in problem.model.system_iter(include_self = True, recurse = True)
+                         if system.nonlinear_solver is not None]
+
+    def _solver_stats(self):
+        newton_iterations = solves = cache_hits = 0
+        for solver in self._solvers:
+            stats = getattr(solver, "warm_start_stats", None)
+            if stats is not None:
+                newton_iterations += stats["iterations"]
+                solves += stats["solves"]
+            cache = getattr(solver, "cache", None)
+            if cache is not None:
+                cache_hits += cache.hits
+        return newton_iterations, solves, cache_hits
+
+    def record_iteration_driver(self, recording_requester, data, metadata):
+        newton_iterations, solves, cache_hits = self._solver_stats()
+        row = {"iteration": self._counter, "timestamp": metadata["timestamp"], "success": metadata["success"],
+               "newton_iterations": newton_iterations, "newton_solves": solves, "cache_hits": cache_hits}
+        # the driver passes views of its vectors, so every value is copied
+        row.update((name, np.array(value, dtype = float)) for name, value in data["output"].items())
+
+        if (self._counter - 1) % self.every:
+            self._skipped = row
+            return
+        self._skipped = None
+        self._rows.append(row)
+        if len(self._rows) >= self.buffer:
+            self._write()
+
+    def _write(self):
+        if self._rows:
+            self._writer.append({name: np.array([row[name] for row in self._rows]) for name in self._rows[0]})
+            self._rows = []
+
+    def record_iteration_system(self, recording_requester, data, metadata):
+        pass
+
+    def record_iteration_solver(self, recording_requester, data, metadata):
+        pass
+
+    def record_iteration_problem(self, recording_requester, data, metadata):
+        pass
+
+    def record_metadata_system(self, system, run_number = None):
+        pass
+
+    def record_metadata_solver(self, solver, run_number = None):
+        pass
+
+    def record_derivatives_driver(self, recording_requester, data, metadata):
+        pass
+
+    def record_viewer_data(self, model_viewer_data):
+        pass
+
+    def shutdown(self):
+        if self._writer is None:
+            return
+        if self._skipped is not None:
+            self._rows.append(self._skipped)
+            self._skipped = None
+        self._write()
+        self._writer.close()
+        self._writer = None
+
+
+def read_history(path, mmap = True):
+    # every column recorded by a HistoryRecorder, as read only memory maps unless mmap is False, so the history
+    # of a long run can be post-processed without reading all of it. A store still being written is read up to
+    # its last written rows.
+    return read_columns(path, mmap = mmap)
+
+
+if __name__ == "__main__":
+
+    import time
+    import shutil
+    import tempfile
+    from truss_generators import pratt
+    from truss_builder import Truss_Model
+    from openmdao.api import Problem, ScipyOptimizeDriver
+
+    # sizing of a 101 member pratt truss with the history recorded every iteration and every 5th iteration
+    tmp = tempfile.mkdtemp()
+    for every in (1, 5):
+        prob = Problem(Truss_Model(geometry = pratt(25)), reports = None)
+        prob.driver = ScipyOptimizeDriver(optimizer = "SLSQP", disp = False)
+        prob.driver.declare_coloring()
+        prob.driver.add_recorder(HistoryRecorder(f"{tmp}/every{every}", every = every))
+        prob.model.add_design_var("indeps.A", lower = 0.001, upper = 100)
+        prob.model.add_objective("obj_cmp.obj")
+        prob.model.add_constraint("con.con", lower = 0)
+        prob.setup(mode = "rev")
+        prob.set_solver_print(level = -1)
+        start = time.perf_counter()
+        prob.run_driver()
+        prob.cleanup()
+        print(f"every {every}: run_driver {time.perf_counter() - start:.3f} s")
+
+        history = read_history(f"{tmp}/every{every}")
+        print(f"  {len(history['iteration'])} rows, iterations {history['iteration'][:4]} ... {history['iteration'][-1]}")
+        print(f"  objective {history['obj_cmp.obj'][0, 0]:.4g} -> {history['obj_cmp.obj'][-1, 0]:.4g}, "
+              f"min margin {history['con.con'][-1].min():.3g} MPa, {history['newton_iterations'][-1]} Newton iterations")
+    shutil.rmtree(tmp)
@@ -0,0 +1,132 @@
+import numpy as np
+from openmdao.api import Problem
+from truss_builder import TrussGeometry
+
+
+class AnalysisSession(object):
+
+    # a truss model set up once and analysed any number of times, for loops over designs that would otherwise
+    # build and set up a new Problem per design. Only models built from a TrussGeometry take a session, Truss_Model,
+    # Truss_V3_Model and the *_V4.Truss_Analysis models, since the set_* methods take arrays over the members, loads
+    # and supports of the geometry. The script models that name a variable per member raise a ValueError. Values go
+    # through Problem.set_val with the shapes of the single setup, so a value of another shape is an error instead
+    # of a new setup.
+    #
+    #     session = AnalysisSession(Truss_Model(geometry = pratt(25)))
+    #     for areas in designs:
+    #         session.set_areas(areas)
+    #         results = session.run()
+    #         results["sigma"], results["objective"]
+
+    def __init__(self, model, force_alloc_complex = False):
+        if "geometry" not in model.options or model.options["geometry"] is None:
+            raise ValueError(f"{type(model).__name__} has no TrussGeometry, a session needs a Truss_Model or Truss_V3_Model built from one.")
+        self.prob = Problem(model, reports = None)
+        self.prob.setup(force_alloc_complex = force_alloc_complex)
+        self.prob.set_solver_print(level = -1)
+        self.prob.final_setup()
+        self.geometry = model.options["geometry"]
+        self.n_runs = 0
+
+        outputs = self.prob.model.get_io_metadata(iotypes = "output", metadata_keys = ["shape"])
+        names = ("indeps.A", "indeps.ext", "indeps.ext_direction", "indeps.L", "indeps.reaction_direction", "indeps.direction", "indeps.end_direction")
+        self._shapes = {name: outputs[name]["shape"] for name in names if name in outputs}
+        self._v4 = "cycle.truss.force" in outputs
+
+    def _set(self, name, value):
+        shape = self._shapes[name]
+        try:
+            value = np.broadcast_to(np.asarray(value, dtype = float), shape)
+        except ValueError:
+            raise ValueError(f"A value of shape {np.shape(value)} does not fit {name} of shape {shape}, "
+                             f"a truss of another size needs a new session.") from None
+        self.prob.set_val(name, value)
+
+    def set_areas(self, areas):
+        # cross sectional area of every member in m**2, or one area for all of them
+        self._set("indeps.A", areas)
+
+    def set_loads(self, forces = None, directions = None):
+        # force in N and direction in rad of every load, shaped (n_loads,) or (n_cases, n_loads) like the geometry
+        if forces is not None:
+            self._set("indeps.ext", forces)
+        if directions is not None:
+            self._set("indeps.ext_direction", directions)
+
+    def set_directions(self, directions = None, reaction_directions = None):
+        # direction in rad of every member from its 0th to its 1st end, and of every reaction force. The V3 model
+        # takes the direction of a member at both ends, the 1st end pointing the other way.
+        if directions is not None:
+            if "indeps.direction" in self._shapes:
+                self._set("indeps.direction", directions)
+            else:
+                directions = np.broadcast_to(np.asarray(directions, dtype = float), (self.geometry.n_members,))
+                self._set("indeps.end_direction", np.stack([directions, directions + np.pi], axis = 1))
+        if reaction_directions is not None:
+            self._set("indeps.reaction_direction", reaction_directions)
+
+    def set_nodes(self, nodes):
+        # moves the nodes, keeping members, supports and loads, and updates member directions and lengths
+        geometry = self.geometry
+        moved = TrussGeometry.from_arrays(nodes, geometry.members, geometry.reaction_nodes, geometry.reaction_directions,
+                                          geometry.load_nodes, geometry.load_forces, geometry.load_directions, geometry.areas)
+        if moved.n_nodes != geometry.n_nodes:
+            raise ValueError(f"{moved.n_nodes} nodes given for a truss of {geometry.n_nodes} nodes, a truss of another size needs a new session.")
+        self.set_directions(moved.directions())
+        self._set("indeps.L", moved.lengths())
+
+    def run(self):
+        # analyses the current values and returns the member forces and stresses, the stress margins and the objective
+        self.prob.run_model()
+        self.n_runs += 1
+        return self.results()
+
+    def results(self):
+        n_members = self.geometry.n_members
+        if self._v4:
+            force = self.prob.get_val("cycle.truss.force")[..., :n_members].copy()
+        else:
+            force = np.array([self.prob.get_val(f"cycle.beam{k}.beam_force")[0] for k in range(n_members)])
+        return {"force": force, "sigma": self.prob.get_val("stress.sigma").copy(), "margin": self.prob.get_val("con.con").copy(),
+                "objective": float(self.prob.get_val("obj_cmp.obj")[0])}
+
+if __name__ == "__main__":
+
+    import time
+    from truss_builder import Truss_Model, Truss_V3_Model
+    from truss_generators import pratt
+
+    # the same random designs analysed with a new Problem per design and with one session, areas and load
+    # magnitudes changing from design to design
+    rng = np.random.default_rng(0)
+    for label, model, geometry in (("seven truss V4", Truss_Model, None), ("seven truss V3", Truss_V3_Model, None),
+                                   ("pratt truss, 101 members", Truss_Model, pratt(25))):
+        if geometry is None:
+            from seven_truss_V4 import seven_truss_geometry
+            geometry = seven_truss_geometry()
+        designs = [(rng.uniform(.05, .5, geometry.n_members), geometry.load_forces * rng.uniform(.5, 1.5)) for _ in range(100)]
+
+        start = time.perf_counter()
+        rebuilt = []
+        for areas, forces in designs:
+            prob = Problem(model(geometry = geometry), reports = None)
+            prob.setup()
+            prob.set_solver_print(level = -1)
+            prob["indeps.A"] = areas
+            prob["indeps.ext"] = forces
+            prob.run_model()
+            rebuilt.append(prob["stress.sigma"].copy())
+        rebuild_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        session = AnalysisSession(model(geometry = geometry))
+        reused = []
+        for areas, forces in designs:
+            session.set_areas(areas)
+            session.set_loads(forces)
+            reused.append(session.run()["sigma"])
+        session_time = time.perf_counter() - start
+
+        difference = max(np.abs(a - b).max() / np.abs(a).max() for a, b in zip(rebuilt, reused))
+        print(f"{label}: {len(designs)} designs, setup per design {rebuild_time:.3f} s, one session {session_time:.3f} s, "
+              f"{rebuild_time / session_time:.1f}x, largest relative stress difference {difference:.1e}")
@@ -0,0 +1,102 @@
+import os
+import math
+import itertools
+import multiprocessing
+import numpy as np
+from openmdao.api import Problem, AnalysisError
+from truss_io import ColumnWriter, read_columns
+
+
+def design_grid(levels):
+    # full factorial design table, levels maps each variable to the list of values it takes
+    names = list(levels)
+    points = list(itertools.product(*[range(len(levels[name])) for name in names]))
+    return {name: np.array([np.asarray(levels[name][point[i]], dtype = float) for point in points]) for i, name in enumerate(names)}
+
+
+# each worker process keeps one Problem for the whole sweep, so setup is paid once per worker instead of once per run
+_worker = {}
+
+def _setup_worker(model_factory, outputs):
+    prob = Problem(model_factory(), reports = None)
+    prob.setup()
+    prob.set_solver_print(level = -1)
+    prob.final_setup()
+    # a Newton solve that stops short of its tolerance is a failed row, not a result
+    for system in prob.model.system_iter(include_self = True, recurse = True):
+        solver = system.nonlinear_solver
+        if solver is not None and "err_on_non_converge" in solver.options:
+            solver.options["err_on_non_converge"] = True
+    _worker["prob"] = prob
+    _worker["outputs"] = outputs
+    _worker["start"] = prob.model._outputs.asarray(copy = True)
+
+def _evaluate(chunk):
+    prob = _worker["prob"]
+    outputs = _worker["outputs"]
+    n_rows = len(next(iter(chunk.values())))
+
+    results = {name: [] for name in outputs}
+    failed = np.zeros(n_rows, dtype = bool)
+    for i in range(n_rows):
+        for name, column in chunk.items():
+            prob[name] = column[i]
+        try:
+            prob.run_model()
+        except (AnalysisError, RuntimeError, ValueError):
+            # a diverged or unconverged solve raises AnalysisError, and a mechanism makes the factorization of the
+            # direct solvers raise RuntimeError or LinAlgError, a ValueError. The row is recorded as failed instead of
+            # stopping the sweep, and the next row starts from the starting outputs instead of the failed solve.
+            failed[i] = True
+            prob.model._outputs.set_val(_worker["start"])
+        for name in outputs:
+            value = np.array(prob[name], dtype = float)
+            if failed[i]:
+                value[...] = np.nan
+            results[name].append(value)
+
+    results = {name: np.array(values) for name, values in results.items()}
+    results["failed"] = failed
+    return results
+
+
+def run_sweep(model_factory, table, outputs, path, n_workers = None, chunk_size = None):
+    # evaluates the model at every row of the design table and streams the design columns, the requested outputs
+    # and a failed flag to the columnar store at path, in row order. model_factory must be picklable (a model
+    # class or a functools.partial of one) since every worker builds its own Problem from it.
+    table = {name: np.asarray(column, dtype = float) for name, column in table.items()}
+    n_rows = len(next(iter(table.values())))
+    n_workers = os.cpu_count() if n_workers is None else n_workers
+    if chunk_size is None:
+        # a few chunks per worker balance the load without paying interprocess overhead on every row
+        chunk_size = max(1, math.ceil(n_rows / (4 * n_workers)))
+
+    chunks = [{name: column[start:start + chunk_size] for name, column in table.items()} for start in range(0, n_rows, chunk_size)]
+
+    with ColumnWriter(path) as writer:
+        if n_workers == 1:
+            _setup_worker(model_factory, outputs)
+            for chunk in chunks:
+                writer.append({**chunk, **_evaluate(chunk)})
+        else:
+            with multiprocessing.Pool(n_workers, initializer = _setup_worker, initargs = (model_factory, outputs)) as pool:
+                for chunk, results in zip(chunks, pool.imap(_evaluate, chunks)):
+                    writer.append({**chunk, **results})
+
+    return read_columns(path)
+
+
+if __name__ == "__main__":
+
+    from seven_truss_V4 import Truss_Analysis
+
+    # load magnitude and direction at node 3, with every member area scaled together
+    F = 4 * 10 ** 7
+    table = design_grid({"indeps.ext": [[f] for f in np.linspace(.5, 1.5, 11) * F],
+                         "indeps.ext_direction": [[d] for d in np.linspace(math.pi, 2 * math.pi, 13)],
+                         "indeps.A": [a * np.ones(7) for a in (.1, .2, .4)]})
+
+    results = run_sweep(Truss_Analysis, table, ["cycle.truss.force", "stress.sigma", "obj_cmp.obj"], "seven_truss_sweep")
+
+    print("evaluated", len(results["failed"]), "designs,", int(np.sum(results["failed"])), "failed")
+    print("largest stress magnitude", np.nanmax(np.abs(results["stress.sigma"])), "MPa")
@@ -0,0 +1,119 @@
+from openmdao.api import NewtonSolver
+
+
+class WarmStartMixin(object):
+
+    # seeds every Newton solve from the last converged solution, optionally moved by one chord step that reuses the
+    # factorization left over from the last solve, and counts the Newton iterations this saves
+
+    def _declare_options(self):
+        super()._declare_options()
+        self.options.declare("predictor", default = "linear", values = ["none", "previous", "linear"],
+                             desc = "Start from the outputs as they are, from the last converged solution, or from one linear predictor step off it")
+
+    def _setup_solvers(self, system, depth):
+        super()._setup_solvers(system, depth)
+        self._converged = None
+        self._factored = False
+        self._reference = None
+        self.warm_start_stats = {"solves": 0, "iterations": 0, "cold_iterations": None, "predictions": 0, "rejected": 0}
+
+    def _predict(self, system):
+        # chord step, exact for loads since the equilibrium equations are linear in the forces and the loads
+        self._run_apply()
+        norm0 = self._iter_get_norm()
+        system._dresiduals.set_vec(system._residuals)
+        system._dresiduals *= -1.0
+        self.linear_solver.solve("fwd")
+        system._outputs += system._doutputs
+        self._run_apply()
+
+        self.warm_start_stats["predictions"] += 1
+        if not self._iter_get_norm() < norm0:
+            # the factorization did not belong to this solution, e.g. it came from a total coloring pass
+            system._outputs.set_val(self._converged)
+            self.warm_start_stats["rejected"] += 1
+
+    def _iter_initialize(self):
+        # a warm start only moves the first iterate, the relative tolerance stays relative to the residual of the
+        # outputs as they were, otherwise a start within round-off of the solution can never meet it
+        norm0, norm = super()._iter_initialize()
+        if self._reference is not None:
+            norm0 = max(norm0, self._reference)
+        return norm0, norm
+
+    def solve(self):
+        system = self._system()
+        predictor = self.options["predictor"]
+        self._reference = None
+        if predictor != "none" and self._converged is not None and not system.under_complex_step:
+            self._run_apply()
+            self._reference = self._iter_get_norm()
+            system._outputs.set_val(self._converged)
+            if predictor == "linear" and self._factored:
+                self._predict(system)
+
+        super().solve()
+
+        if not system.under_complex_step:
+            stats = self.warm_start_stats
+            stats["solves"] += 1
+            stats["iterations"] += self._iter_count
+            if stats["cold_iterations"] is None:
+                stats["cold_iterations"] = self._iter_count
+            if self._iter_count > 0:
+                self._factored = True
+            if self._iter_count < self.options["maxiter"]:
+                self._converged = system._outputs.asarray(copy = True)
+
+    def _restored(self, system):
+        # the outputs were set to a converged solution without a solve, e.g. by a solution cache, and the next solve
+        # starts from them
+        self._converged = system._outputs.asarray(copy = True)
+
+    def warm_start_report(self):
+        # the first solve starts cold and every later solve is compared against it. Each prediction replaces Newton
+        # iterations, which linearize and factorize, by a linear solve on the last factorization, so the predictor
+        # solves are reported next to the iterations they save.
+        stats = self.warm_start_stats
+        cold = stats["cold_iterations"] or 0
+        saved = cold * stats["solves"] - stats["iterations"]
+        accepted = stats["predictions"] - stats["rejected"]
+        return (f"{self._system().msginfo}: {stats['solves']} Newton solves took {stats['iterations']} iterations, {saved} fewer than "
+                f"{stats['solves']} cold starts of {cold} iterations, for {stats['predictions']} predictor linear solves, "
+                f"{accepted} of {stats['predictions']} linear predictions accepted")
+
+
+class WarmStartNewtonSolver(WarmStartMixin, NewtonSolver):
+    pass
+
+
+if __name__ == "__main__":
+
+    import time
+    import numpy as np
+    from openmdao.api import Problem
+    from truss_builder import Truss_V3_Model
+    from truss_generators import pratt
+
+    # a sweep of load magnitudes on a 401 member pratt truss in the V3 formulation. The member forces change with
+    # the loads, so every solve of a plain Newton solver linearizes and factorizes the cycle, while the linear
+    # predictor solves the new loads on the last factorization. In a sizing run only the stresses change with the
+    # areas and both start at the solution, so warm starting saves nothing there.
+    geometry = pratt(100)
+    scales = np.random.default_rng(0).uniform(.5, 1.5, (20, len(geometry.load_nodes)))
+    for warm_start in (False, True):
+        prob = Problem(Truss_V3_Model(geometry = geometry, warm_start = warm_start), reports = None)
+        prob.setup()
+        prob.set_solver_print(level = -1)
+        prob.final_setup()
+        ext = prob["indeps.ext"].copy()
+        iterations = 0
+        start = time.perf_counter()
+        for scale in scales:
+            prob["indeps.ext"] = ext * scale
+            prob.run_model()
+            iterations += prob.model.cycle.nonlinear_solver._iter_count
+        print(f"warm start {warm_start}: {len(scales)} load cases in {iterations} Newton iterations, {time.perf_counter() - start:.2f} s")
+        if warm_start:
+            print(prob.model.cycle.nonlinear_solver.warm_start_report())
@@ -34,33 +34,31 @@ class Truss_Analysis(Group):
         self.connect("indeps.A2", ["trussBC.A", "obj_cmp.A2"])
 
 
-prob = Problem()
-prob.model = Truss_Analysis()
+if __name__ == "__main__":
 
-prob.driver = ScipyOptimizeDriver()
-prob.driver.options["optimizer"] = "SLSQP"
-# prob.driver.options["tol"] = 1e-8
+    prob = Problem()
+    prob.model = Truss_Analysis()
 
-prob.model.add_design_var("indeps.A1", lower = .001, upper = 100)
-prob.model.add_design_var("indeps.A2", lower = .001, upper = 100)
-prob.model.add_objective("obj_cmp.obj")
-prob.model.add_constraint("con1.con", lower = 0)
-prob.model.add_constraint("con2.con", lower = 0)
+    prob.driver = ScipyOptimizeDriver()
+    prob.driver.options["optimizer"] = "SLSQP"
+    # prob.driver.options["tol"] = 1e-8
 
-prob.setup()
-# prob.check_partials(compact_print = True)
-prob.set_solver_print(level = 0)
-
-prob.model.approx_totals()
-
-prob.run_driver()
-
-print("minimum found at")
-print("A1 = ", prob["indeps.A1"])
-print("P1 = ", prob["indeps.P1"])
-print("A2 = ", prob["indeps.A2"])
-print("P2 = ", prob["indeps.P2"])
+    prob.model.add_design_var("indeps.A1", lower = .001, upper = 100)
+    prob.model.add_design_var("indeps.A2", lower = .001, upper = 100)
+    prob.model.add_objective("obj_cmp.obj")
+    prob.model.add_constraint("con1.con", lower = 0)
+    prob.model.add_constraint("con2.con", lower = 0)
 
+    prob.setup()
+    # prob.check_partials(compact_print = True)
+    prob.set_solver_print(level = 0)
 
+    prob.model.approx_totals()
 
+    prob.run_driver()
 
+    print("minimum found at")
+    print("A1 = ", prob["indeps.A1"])
+    print("P1 = ", prob["indeps.P1"])
+    print("A2 = ", prob["indeps.A2"])
+    print("P2 = ", prob["indeps.P2"])